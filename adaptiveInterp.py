@@ -0,0 +1,94 @@
+# Adaptive Chebyshev Interpolation
+#
+# Instead of fixing the nodes first and measuring the error afterwards
+# (compute_error() in HW8/newtonDD3.py), adaptiveInterp chooses the number
+# of nodes: it samples f at n = 9, 17, 33, ... Chebyshev points of the
+# second kind, which nest, so every doubling evaluates f only at the new
+# points. Once the highest quarter of the Chebyshev coefficients is below
+# the tolerance the series is truncated to its smallest useful degree and
+# the error is checked against f on a dense grid, streamed in chunks; the
+# values of f on that grid are kept, so each grid point costs one evaluation.
+#
+#  result = adaptiveInterp(f, a, b, tol)
+#
+#  Inputs:
+#    f          Vectorized function to interpolate
+#    a,b        The interval
+#    tol        Target for the maximum absolute error on [a,b]
+#  Outputs:
+#    result.coefs      Chebyshev coefficients (evaluate with clenshaw(t,coefs,a,b))
+#    result.nodes      Number of interpolation nodes sampled
+#    result.fevals     Evaluations of f, including the dense check
+#    result.maxError   Error measured on the check grid
+#    result.converged  False if nmax nodes did not meet tol
+
+from collections import namedtuple
+import numpy as np
+from chebInterp import chebyshev_points2,chebCoefs2,chebTruncate,clenshaw
+
+############################## VARIABLES #############################
+Adaptive = namedtuple("Adaptive",["coefs","a","b","nodes","fevals","maxError","converged"])
+CHECK = 10000     # dense check grid points
+CHUNK = 4096      # check points evaluated at a time
+############################## FUNCTIONS #############################
+
+# Max |p - f| on CHECK equispaced points, one chunk at a time; stops at the
+# first chunk above tol. Returns the error and the evaluations of f used.
+# The grid is fixed, so with a cache (a dict) the values of f on a chunk
+# are computed once and reused by every later check.
+def checkError(f,coefs,a,b,tol=np.inf,check=CHECK,chunk=CHUNK,cache=None):
+    err = 0.0
+    used = 0
+    for start in range(0,check,chunk):
+        t = a + (b - a)*np.arange(start,min(start+chunk,check))/(check - 1)
+        if cache is not None and start in cache:
+            ft = cache[start]
+        else:
+            ft = f(t)
+            used += t.size
+            if cache is not None:
+                cache[start] = ft
+        err = max(err,float(np.max(np.abs(clenshaw(t,coefs,a,b) - ft))))
+        if err > tol:
+            break
+    return err,used
+
+def adaptiveInterp(f,a,b,tol,nmin=9,nmax=2**16+1,check=CHECK,chunk=CHUNK):
+    # n - 1 must be a power of two for the points to nest
+    n = 2**int(np.ceil(np.log2(max(nmin,3) - 1))) + 1
+    vals = np.asarray(f(chebyshev_points2(n,a,b)),dtype=float)
+    fevals = n
+    cache = {}
+    while True:
+        c = chebCoefs2(vals)
+        coefs = chebTruncate(c,tol/8,relative=False)
+        if len(coefs) <= n - n//4:
+            err,used = checkError(f,coefs,a,b,tol,check,chunk,cache)
+            fevals += used
+            if err <= tol:
+                return Adaptive(coefs,a,b,n,fevals,err,True)
+            # slowly decaying coefficients (f not smooth): the dropped tail
+            # adds up, so try the full interpolant before adding nodes
+            err,used = checkError(f,c,a,b,tol,check,chunk,cache)
+            fevals += used
+            if err <= tol:
+                return Adaptive(c,a,b,n,fevals,err,True)
+        if 2*n - 1 > nmax:
+            err,used = checkError(f,c,a,b,np.inf,check,chunk,cache)
+            return Adaptive(c,a,b,n,fevals + used,err,False)
+
+        # double: the old points are the even ones of the new set
+        N = 2*(n - 1)
+        j = np.arange(1,N,2)
+        new = np.asarray(f(0.5*(a + b) + 0.5*(b - a)*np.cos(j*np.pi/N)),dtype=float)
+        grown = np.empty(N + 1)
+        grown[0::2] = vals
+        grown[1::2] = new
+        vals = grown
+        fevals += new.size
+        n = N + 1
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  r = adaptiveInterp(np.cos,0,np.pi/2,1e-12)
+##  r.nodes, len(r.coefs), r.fevals, r.maxError
+##  clenshaw(np.linspace(0,np.pi/2,500),r.coefs,r.a,r.b)
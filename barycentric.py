@@ -0,0 +1,78 @@
+# Barycentric Lagrange Interpolation
+#
+# p(t) = sum_j w_j y_j/(t - x_j) / sum_j w_j/(t - x_j)
+#
+# The weights w depend only on the nodes x: O(n^2) once for general nodes
+# (baryWeights) or O(n) in closed form for chebyshev_nodes (chebyshevWeights).
+# Evaluation is O(n) per point and stable at high degree, and new y values
+# on the same nodes reuse the weights. y may be a stack of datasets (..., n).
+
+import numpy as np
+
+############################## VARIABLES #############################
+# evaluation points handled per block, to bound the (block, n) work array
+CHUNK = 2048
+############################## FUNCTIONS #############################
+
+# Barycentric weights w_j = 1/prod_{k!=j} (x_j - x_k) for arbitrary distinct nodes.
+# The products are accumulated as sums of logs, so they neither overflow
+# nor underflow for large n, and rescaled so that max |w| = 1; a common
+# factor cancels in baryEval.
+def baryWeights(x):
+    x = np.asarray(x,dtype=float)
+    n = len(x)
+    logw = np.empty(n)
+    negative = np.empty(n,dtype=bool)
+    for start in range(0,n,CHUNK):
+        diff = x[start:start+CHUNK,None] - x[None,:]
+        rows = np.arange(diff.shape[0])
+        diff[rows,start+rows] = 1
+        if np.any(diff == 0):
+            raise ValueError("ERROR CODE 2: repeated node in x")
+        logw[start:start+CHUNK] = -np.sum(np.log(np.abs(diff)),axis=1)
+        negative[start:start+CHUNK] = np.count_nonzero(diff < 0,axis=1) % 2 == 1
+    w = np.exp(logw - np.max(logw))
+    return np.where(negative,-w,w)
+
+# Closed form weights for chebyshev_nodes(n,a,b): (-1)^k sin((2k-1)pi/(2n))
+def chebyshevWeights(n):
+    k = np.arange(1,n+1)
+    return (-1.0)**k*np.sin((2*k - 1)*np.pi/(2*n))
+
+# Evaluate the interpolant of y on nodes x with weights w at the points t.
+# Returns an array of shape t.shape + y.shape[:-1].
+def baryEval(t,x,w,y):
+    x = np.asarray(x,dtype=float)
+    y = np.asarray(y,dtype=float)
+    t = np.asarray(t,dtype=float)
+    n = len(x)
+    if (y.shape[-1] != n or len(w) != n):
+        raise ValueError("ERROR CODE 1: x, w and y are different sizes")
+    Y = y.reshape(-1,n).T         # (n, datasets)
+    tt = t.ravel()
+    out = np.empty((tt.size,Y.shape[1]))
+    for start in range(0,tt.size,CHUNK):
+        tb = tt[start:start+CHUNK]
+        diff = tb[:,None] - x[None,:]
+        hit = diff == 0
+        with np.errstate(divide='ignore',invalid='ignore'):
+            C = w/diff
+            C[hit.any(axis=1)] = 0
+            val = (C @ Y)/C.sum(axis=1)[:,None]
+        # points that coincide with a node take the data value
+        rows,cols = np.nonzero(hit)
+        val[rows] = Y[cols]
+        out[start:start+CHUNK] = val
+    return out.reshape(t.shape + y.shape[:-1])
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  from newtonInterp import chebyshev_nodes
+##  x = chebyshev_nodes(50,0,np.pi/2)
+##  w = chebyshevWeights(50)
+##  t = np.linspace(0,np.pi/2,10**6)
+##  baryEval(t,x,w,np.cos(x))
+#### same nodes, new data: the weights are reused
+##  baryEval(t,x,w,np.sin(x))
+#### arbitrary nodes
+##  w = baryWeights(years)
+##  baryEval(2010,years,w,production)
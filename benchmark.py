@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+'''
+ ROOT FINDER BENCHMARK
+
+ Runs bisection, fpi, newton, modified newton, newtonBisection and secant
+ (from rootFinders.py) over a catalog of test problems and a range of
+ tolerances, and records iterations, function evaluations and wall time.
+
+  python3 benchmark.py                  run and compare with the baseline
+  python3 benchmark.py --update         run and overwrite the baseline
+  python3 benchmark.py --tol 1e-6 1e-10 choose the tolerances
+
+ The baseline is benchmark_baseline.json. A run fails (exit code 1) when a
+ case changes state, needs more iterations or evaluations than recorded,
+ or gets slower than TIME_FACTOR times the recorded time. Times are per
+ solve and only compared above TIME_FLOOR, since shorter ones are mostly noise.
+ Iteration and evaluation counts are exact, so those checks are reliable
+ on any machine; the time check assumes a baseline from similar hardware.
+'''
+import argparse
+import json
+import os
+import time
+from math import exp,cos,sin,log
+from instrument import Monitor
+import rootFinders as rf
+
+############################## VARIABLES #############################
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),"benchmark_baseline.json")
+TOLERANCES = (1e-4,1e-8,1e-12)
+MAX_ITERS = 200
+# time per solve = best of REPEATS runs of NUMBER solves
+REPEATS = 5
+NUMBER = 100
+TIME_FACTOR = 3.0
+TIME_FLOOR = 2e-6
+
+# f, df, a fixed point map g (or None), bracket [a,b], guesses x0,x1,
+# multiplicity of the root and the true root
+def _problem(f,df,g,a,b,x0,x1,m,root):
+    return {"f": f, "df": df, "g": g, "a": a, "b": b, "x0": x0, "x1": x1, "m": m, "root": root}
+
+def _poly(x):
+    return 54*x**6 + 45*x**5 - 102*x**4 - 69*x**3 + 35*x**2 + 16*x - 4
+
+def _dpoly(x):
+    return 324*x**5 + 225*x**4 - 408*x**3 - 207*x**2 + 70*x + 16
+
+CATALOG = {
+    # bisection2.py
+    "x-exp(-x)":  _problem(lambda x: x - exp(-x),lambda x: 1 + exp(-x),lambda x: exp(-x),
+                           0,1,1.0,0.9,1,0.5671432904097838),
+    # HW2/bisection.py, Example 1.2 in Sauer
+    "cos(x)-x":   _problem(lambda x: cos(x) - x,lambda x: -sin(x) - 1,cos,
+                           0,1,1.0,0.9,1,0.7390851332151607),
+    # the commented alternative x*x - 2, with the map from HW2/fpi2.py
+    "x^2-2":      _problem(lambda x: x*x - 2,lambda x: 2*x,lambda x: x - 0.5*(x*x - 2),
+                           1,2,1.0,1.5,1,2**0.5),
+    # newtonBisection.py / HW4, simple root 1/2 of the sextic
+    "sextic@1/2": _problem(_poly,_dpoly,None,0.4,0.6,0.6,0.55,1,0.5),
+    # HW3/newton modified.py, double root -2/3 of the same sextic
+    "sextic@-2/3":_problem(_poly,_dpoly,None,-0.8,-0.5,-0.5,-0.55,2,-2/3),
+    # HW3/newtonBisection Modified.py
+    "exp-decay":  _problem(lambda x: 4*exp(-0.2*x) - 15*exp(-0.75*x),
+                           lambda x: 11.25*exp(-0.75*x) - 0.8*exp(-0.2*x),None,
+                           1,4,1.0,1.5,1,log(3.75)/0.55),
+    # triple root
+    "(x-1)^3e^x": _problem(lambda x: (x-1)**3*exp(x),lambda x: (x-1)**2*(x+2)*exp(x),None,
+                           0,1.7,2.0,1.9,3,1.0),
+    # flat: all derivatives vanish at the root
+    "flat":       _problem(lambda x: x*exp(-1/(x*x)) if x != 0 else 0.0,
+                           lambda x: (1 + 2/(x*x))*exp(-1/(x*x)) if x != 0 else 0.0,None,
+                           -0.5,0.7,0.5,0.45,1,0.0),
+}
+
+# name -> function(problem, tol, monitor) returning [state,x,iters]
+SOLVERS = {
+    "bisection":       lambda p,tol,m: rf.bisection(p["f"],p["a"],p["b"],tol,MAX_ITERS,monitor=m),
+    "fpi":             lambda p,tol,m: rf.fpi(p["g"],p["x0"],tol,MAX_ITERS,monitor=m),
+    "newton":          lambda p,tol,m: rf.newton(p["f"],p["df"],p["x0"],tol,MAX_ITERS,monitor=m),
+    "modified newton": lambda p,tol,m: rf.newton(p["f"],p["df"],p["x0"],tol,MAX_ITERS,monitor=m,
+                                                 multiplicity=p["m"]),
+    "newtonBisection": lambda p,tol,m: rf.newtonBisection(p["f"],p["df"],p["a"],p["b"],tol,MAX_ITERS,monitor=m),
+    "secant":          lambda p,tol,m: rf.secant(p["f"],p["x0"],p["x1"],tol,MAX_ITERS,monitor=m),
+}
+############################## FUNCTIONS #############################
+
+def _key(problem,solver,tol):
+    return "%s|%s|%g" % (problem,solver,tol)
+
+# One case: counts come from a monitored run, the time from unmonitored
+# runs so that the instrumentation is not timed.
+def runCase(problem,solver,tol):
+    p = CATALOG[problem]
+    solve = SOLVERS[solver]
+    m = Monitor(record=False)
+    state,x,iters = solve(p,tol,m)
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(NUMBER):
+            solve(p,tol,None)
+        best = min(best,(time.perf_counter() - start)/NUMBER)
+    err = abs(x - p["root"]) if x is not None else None
+    return {"state": int(state), "iters": int(iters), "fevals": sum(m.calls.values()),
+            "error": err, "time": best}
+
+def runAll(tolerances=TOLERANCES,problems=None,solvers=None):
+    results = {}
+    for problem in problems or CATALOG:
+        for solver in solvers or SOLVERS:
+            if solver == "fpi" and CATALOG[problem]["g"] is None:
+                continue
+            for tol in tolerances:
+                results[_key(problem,solver,tol)] = runCase(problem,solver,tol)
+    return results
+
+def compare(results,baseline):
+    problems = []
+    for key,new in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if new["state"] != old["state"]:
+            problems.append("%s: state %d -> %d" % (key,old["state"],new["state"]))
+        for field in ("iters","fevals"):
+            if new[field] > old[field]:
+                problems.append("%s: %s %d -> %d" % (key,field,old[field],new[field]))
+        if old["time"] > TIME_FLOOR and new["time"] > TIME_FACTOR*old["time"]:
+            problems.append("%s: time %.3g s -> %.3g s" % (key,old["time"],new["time"]))
+    return problems
+
+def printTable(results):
+    print("{:>12} {:>16} {:>8} {:>6} {:>6} {:>7} {:>12} {:>12}".format(
+        "problem","solver","tol","state","iters","fevals","error","time [us]"))
+    for key,r in results.items():
+        problem,solver,tol = key.split("|")
+        err = "%12.3e" % r["error"] if r["error"] is not None else "%12s" % "-"
+        print("{:>12} {:>16} {:>8} {:6d} {:6d} {:7d} {} {:12.2f}".format(
+            problem,solver,tol,r["state"],r["iters"],r["fevals"],err,1e6*r["time"]))
+
+def loadBaseline(path=BASELINE):
+    with open(path) as fh:
+        return json.load(fh)["results"]
+
+def saveBaseline(results,path=BASELINE):
+    with open(path,"w") as fh:
+        json.dump({"maxIteration": MAX_ITERS,"results": results},fh,indent=1,sort_keys=True)
+        fh.write("\n")
+
+################################ MAIN ###############################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the root finders against a stored baseline")
+    parser.add_argument("-u","--update",action="store_true",help="overwrite the baseline")
+    parser.add_argument("-q","--quiet",action="store_true",help="do not print the table")
+    parser.add_argument("--tol",type=float,nargs="+",default=TOLERANCES)
+    parser.add_argument("--baseline",default=BASELINE)
+    args = parser.parse_args()
+
+    results = runAll(args.tol)
+    if not args.quiet:
+        printTable(results)
+    if args.update or not os.path.exists(args.baseline):
+        saveBaseline(results,args.baseline)
+        print("Baseline written to %s" % args.baseline)
+        exit()
+    problems = compare(results,loadBaseline(args.baseline))
+    if problems:
+        print("REGRESSIONS:")
+        for line in problems:
+            print("  " + line)
+        exit(1)
+    print("No regressions against %s" % args.baseline)
@@ -0,0 +1,96 @@
+# Chebyshev Series Interpolation
+#
+# p(t) = sum_{k=0}^{n-1} c_k T_k(s),  s = (2t - a - b)/(b - a)
+#
+# through the n points chebyshev_nodes(n,a,b). The coefficients come from a
+# DCT-II of the samples, done with an FFT in O(n log n), and p is evaluated
+# with the Clenshaw recurrence over arrays of points. Degrees in the
+# thousands are fine; chebTruncate drops the tail of coefficients that is
+# below a tolerance.
+
+import numpy as np
+from newtonInterp import chebyshev_nodes
+
+############################## FUNCTIONS #############################
+
+# DCT-II along the last axis: X_m = sum_j v_j cos(pi m (2j+1)/(2n)),
+# from one real FFT of the even extension [v, reversed v].
+def dct2(v):
+    v = np.asarray(v,dtype=float)
+    n = v.shape[-1]
+    V = np.fft.rfft(np.concatenate([v,v[...,::-1]],axis=-1),axis=-1)[...,:n]
+    return 0.5*(np.exp(-0.5j*np.pi*np.arange(n)/n)*V).real
+
+# Chebyshev coefficients of the interpolant of the values fvals taken at
+# chebyshev_nodes(n,a,b) (in that order). fvals may be stacked (..., n).
+def chebCoefs(fvals):
+    fvals = np.asarray(fvals,dtype=float)
+    n = fvals.shape[-1]
+    c = (2.0/n)*dct2(fvals)
+    c[...,0] /= 2
+    return c
+
+# Sample a vectorized f at n Chebyshev nodes on [a,b] and return the coefficients
+def chebInterp(f,n,a,b):
+    return chebCoefs(f(chebyshev_nodes(n,a,b)))
+
+# Chebyshev points of the second kind (extrema of T_{n-1}) on [a,b]:
+# cos(j pi/(n-1)), j=0..n-1. Going from n to 2n-1 points keeps all the old
+# ones, so samples can be reused when the number of points is doubled.
+def chebyshev_points2(n,a,b):
+    if n == 1:
+        return np.array([0.5*(a + b)])
+    j = np.arange(n)
+    return 0.5*(a + b) + 0.5*(b - a)*np.cos(j*np.pi/(n - 1))
+
+# Chebyshev coefficients of the interpolant of values at chebyshev_points2,
+# from a DCT-I done with one real FFT of the even extension.
+def chebCoefs2(fvals):
+    fvals = np.asarray(fvals,dtype=float)
+    N = fvals.shape[-1] - 1
+    if N == 0:
+        return fvals.copy()
+    v = np.concatenate([fvals,fvals[...,-2:0:-1]],axis=-1)
+    c = np.fft.rfft(v,axis=-1).real/N
+    c[...,0] /= 2
+    c[...,N] /= 2
+    return c
+
+# Evaluate the Chebyshev series with the Clenshaw recurrence
+#   b_k = c_k + 2 s b_{k+1} - b_{k+2},  p = c_0 + s b_1 - b_2
+# coefs may be stacked (..., n); t then broadcasts against coefs.shape[:-1]
+# and the result has the broadcast shape. For every series at every point
+# pass t[:,None] with coefs (m, n): the result is (k, m).
+def clenshaw(t,coefs,a,b):
+    coefs = np.asarray(coefs,dtype=float)
+    n = coefs.shape[-1]
+    s = (2*np.asarray(t,dtype=float) - a - b)/(b - a)
+    s2 = 2*s
+    b1 = np.zeros(np.broadcast_shapes(s.shape,coefs.shape[:-1]))
+    b2 = np.zeros_like(b1)
+    for k in range(n-1,0,-1):
+        b1,b2 = coefs[...,k] + s2*b1 - b2,b1
+    return coefs[...,0] + s*b1 - b2
+
+# Smallest leading part of coefs such that every dropped coefficient has
+# |c_k| <= tol*max|c| (relative=True) or tol. For the geometric decay of a
+# smooth f the truncation error is then of the order of tol; summing the
+# tail instead would let the rounding noise of a long series decide.
+def chebTruncate(coefs,tol,relative=True):
+    coefs = np.asarray(coefs,dtype=float)
+    mag = np.abs(coefs).reshape(-1,coefs.shape[-1]).max(axis=0)
+    if relative:
+        tol = tol*mag.max(initial=0)
+    keep = np.flatnonzero(mag > tol)
+    degree = keep[-1] + 1 if keep.size else 1
+    return coefs[...,:degree]
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  c = chebInterp(np.cos,4096,0,np.pi/2)
+##  c = chebTruncate(c,1e-15)          # len(c) == 14
+##  clenshaw(np.linspace(0,np.pi/2,10**6),c,0,np.pi/2)
+#### several series at once: coefs (m, n), t[:,None] gives shape (k, m)
+##  C = chebInterp(lambda t: np.cos(np.outer(np.arange(1,4),t)),64,0,1)   # (3, 64)
+##  clenshaw(np.linspace(0,1,1000)[:,None],C,0,1)                         # (1000, 3)
+#### values already sampled at chebyshev_nodes(n,a,b)
+##  c = chebCoefs(samples)
@@ -1,8 +1,16 @@
-# Natural cubic spline interpolation
+# Cubic spline interpolation (natural, clamped, not-a-knot or periodic ends)
 import numpy as np
+from collections import namedtuple
 from numpy import size
 import matplotlib.pyplot as pyp
 
+############################## VARIABLES #############################
+UNIFORM_TOL = 1e-12   # relative deviation from x0 + i*h still treated as uniform
+BUCKET_STEPS = 4      # linear steps after a bucket lookup before a binary search
+BOUNDARY = ('natural','clamped','not-a-knot','periodic')
+# factorization of the spline system of one knot vector (see splineFactor)
+SplineFactor = namedtuple("SplineFactor",["bc","mult","piv","superDiag","z","v"])
+
 # Returns the maximum size of x
 def input_sz(x):
     _dim = np.array(x).ndim
@@ -26,11 +34,7 @@ def cubicSpline(x, y,plot=True):
     step = (maxx-minx)/m
     t = np.arange(minx,maxx+step,step)
 
-    val = np.zeros(m+1)
-    der = np.zeros(m+1)
-    cur = np.zeros(m+1)
-    for j in range(m+1):
-        [val[j], der[j], cur[j]] = cubicSplineEval(t[j], x, y, coefs)
+    [val, der, cur] = cubicSplineEvalArray(t, x, y, coefs)
     # just including a basic pause (there are other methods)
     if plot:
         input("Press Enter to continue . . .")
@@ -70,48 +74,296 @@ def cubicSplineEval(t, x, y, coefs):
     return [value,deriv,curv]
 
 
-# Set up cubic spline coefficients
-def cubicSplineSetup(x, y):
+# Interval lookup for arrays of points: i with x[i] <= t < x[i+1], clipped
+# to 0..n-2 (the same answer as the while loop of cubicSplineEval).
+# The knots are classified once:
+#   uniform    x[i] = x0 + i*h within UNIFORM_TOL, i = floor((t - x0)/h)
+#   buckets    [x0, x[-1]] cut into equal buckets, each storing the interval
+#              at its left edge; a point starts there and steps forward
+#              over the few knots inside its bucket (or back one, when
+#              rounding put it in the bucket after a knot on the edge)
+#   otherwise  binary search with np.searchsorted
+class IntervalLocator:
+    def __init__(self, x, buckets=None, tol=UNIFORM_TOL):
+        self.x = np.asarray(x,dtype=float)
+        self.n = input_sz(self.x)
+        self.x0 = self.x[0]
+        n = self.n
+        span = self.x[-1] - self.x0
+        self.h = span/(n-1)
+        self.uniform = bool(np.max(np.abs(self.x - (self.x0 + self.h*np.arange(n)))) <= tol*abs(span))
+        self.start = None
+        if buckets and not self.uniform:
+            self.H = span/buckets
+            edges = self.x0 + self.H*np.arange(buckets)
+            self.start = np.clip(np.searchsorted(self.x,edges,side='right') - 1,0,n-2)
+
+    def __call__(self, t):
+        t = np.asarray(t,dtype=float)
+        if self.start is None and not self.uniform:
+            return self._search(t)
+        tt = np.atleast_1d(t)
+        # NaN and inf cannot be floored to an index: those points take the
+        # binary search, which puts them where searchsorted does
+        finite = np.isfinite(tt)
+        if finite.all():
+            i = self._fast(tt)
+        else:
+            i = np.empty(tt.shape,dtype=np.intp)
+            i[finite] = self._fast(tt[finite])
+            i[~finite] = self._search(tt[~finite])
+        return i.reshape(t.shape)
+
+    def _search(self, t):
+        return np.clip(np.searchsorted(self.x,t,side='right') - 1,0,self.n-2)
+
+    # uniform or bucket lookup of a 1D array of finite points
+    def _fast(self, t):
+        n = self.n
+        if self.uniform:
+            i = np.clip(np.floor((t - self.x0)/self.h),0,n-2).astype(np.intp)
+            # rounding in the division can be one interval off at a knot
+            i += (i < n-2) & (self.x[np.minimum(i+1,n-1)] <= t)
+            i -= (i > 0) & (self.x[i] > t)
+            return i
+        j = np.clip(np.floor((t - self.x0)/self.H),0,len(self.start)-1).astype(np.intp)
+        i = self.start[j]
+        # a point just below a knot on a bucket edge can round into the
+        # bucket that starts at that knot
+        i -= (i > 0) & (self.x[i] > t)
+        for _ in range(BUCKET_STEPS):
+            step = (i < n-2) & (self.x[np.minimum(i+1,n-1)] <= t)
+            if not step.any():
+                return i
+            i += step
+        # crowded buckets: binary search for what is left
+        left = (i < n-2) & (self.x[np.minimum(i+1,n-1)] <= t)
+        if left.any():
+            i[left] = self._search(t[left])
+        return i
+
+# Evaluate cubic spline interpolant at an array of points.
+# The interval of every point is found with a binary search (searchsorted),
+# or with locate, an IntervalLocator of x, and only the outputs listed in orders are computed: 0 = value,
+# 1 = derivative, 2 = curvature. Returns a list in the order requested,
+# each shaped like t. Extrapolation is as in cubicSplineEval: outside
+# (x[0], x[-1]) the value is the end value and the derivatives are 0.
+def cubicSplineEvalArray(t, x, y, coefs, orders=(0,1,2), locate=None):
+    x = np.asarray(x,dtype=float)
+    y = np.asarray(y,dtype=float)
+    t = np.asarray(t,dtype=float)
     n = input_sz(x)
-    coefs = np.zeros(shape=(3,n))
-    
-    # set up tridiagonal matrix and rhs
+
+    # Find interpolation intervals
+    if locate is None:
+        i = np.clip(np.searchsorted(x,t,side='right') - 1,0,n-2)
+    else:
+        i = locate(t)
+    tt = t - x[i]
+    b = coefs[0,i]
+    c = coefs[1,i]
+    d = coefs[2,i]
+    left = t <= x[0]
+    right = t >= x[-1]
+
+    out = []
+    for order in orders:
+        if order == 0:
+            r = y[i] + tt*(b + tt*(c + tt*d))
+            r = np.where(left,y[0],np.where(right,y[-1],r))
+        elif order == 1:
+            r = b + tt*(2*c + tt*3*d)
+        elif order == 2:
+            r = 2*c + tt*6*d
+        else:
+            raise ValueError("orders must be 0 (value), 1 (derivative) or 2 (curvature)")
+        if order > 0:
+            r = np.where(left | right,0.0,r)
+        out.append(r)
+    return out
+
+# Bands and right hand side of the spline system for c = coefs[1,:]
+# (subDiag[i], diag[i], superDiag[i] multiply c[i-1], c[i], c[i+1]),
+# assembled with array slicing. y may be (n,) or (n, m) for m series.
+# Rows 0 and n-1 hold the end conditions:
+#   natural     c[0] = c[n-1] = 0
+#   clamped     b[0] = slopes[0] and the end slope is slopes[1]
+#   not-a-knot  d[0] = d[1] and d[n-3] = d[n-2]; c[0] and c[n-1] are
+#               eliminated into rows 1 and n-2 so the matrix stays
+#               tridiagonal, rows 0 and n-1 are placeholders (see splineSolve)
+#   periodic    y[0] = y[n-1]; the n-1 unknowns c[0..n-2] form a cyclic
+#               system whose corners are subDiag[0] and superDiag[-1]
+def splineBands(x, y, bc='natural', slopes=(0,0)):
+    x = np.asarray(x,dtype=float)
+    y = np.asarray(y,dtype=float)
+    n = input_sz(x)
+    if bc not in BOUNDARY:
+        raise ValueError("bc must be one of " + ", ".join(BOUNDARY))
+    if bc in ('not-a-knot','periodic') and n < 4:
+        raise ValueError("ERROR CODE 1: %s ends need at least 4 knots" % bc)
+    h = np.diff(x)
+    slope = np.diff(y,axis=0)/(h if y.ndim == 1 else h[:,None])
+
+    if bc == 'periodic':
+        if not np.allclose(y[0],y[-1]):
+            raise ValueError("ERROR CODE 3: periodic ends need y[0] == y[-1]")
+        hprev = np.roll(h,1)
+        return hprev,2*(hprev + h),h.copy(),3*(slope - np.roll(slope,1,axis=0))
+
     superDiag = np.zeros(n)
-    diag = np.zeros(n)
+    diag = np.ones(n)
     subDiag = np.zeros(n)
-    rhs = np.zeros(n)
-    diag[0] = 1
-    diag[-1] = 1
-    for i in range(1,n-1):
-        superDiag[i] = x[i+1] - x[i]
-        subDiag[i] = x[i] - x[i-1]
-        diag[i] = 2*(subDiag[i] + superDiag[i])
-        rhs[i] = 3*((y[i+1]-y[i])/superDiag[i] -(y[i] -y[i-1])/subDiag[i])
-    print("superDiag =",superDiag)
-    print("diag =",diag)
-    print("subDiag =",subDiag)
-    print("rhs =",rhs)
+    rhs = np.zeros(y.shape)
+    superDiag[1:-1] = h[1:]
+    subDiag[1:-1] = h[:-1]
+    diag[1:-1] = 2*(h[:-1] + h[1:])
+    rhs[1:-1] = 3*(slope[1:] - slope[:-1])
+    if bc == 'clamped':
+        diag[0] = 2*h[0]
+        superDiag[0] = h[0]
+        rhs[0] = 3*(slope[0] - slopes[0])
+        diag[-1] = 2*h[-1]
+        subDiag[-1] = h[-1]
+        rhs[-1] = 3*(slopes[1] - slope[-1])
+    elif bc == 'not-a-knot':
+        # c[0] = ((h0+h1) c[1] - h0 c[2])/h1 substituted into row 1
+        h0,h1 = h[0],h[1]
+        subDiag[1] = 0
+        diag[1] = (h0 + h1)*(h0 + 2*h1)/h1
+        superDiag[1] = (h1*h1 - h0*h0)/h1
+        # and c[n-1] = ((hp+hl) c[n-2] - hl c[n-3])/hp into row n-2
+        hp,hl = h[-2],h[-1]
+        subDiag[-2] = (hp*hp - hl*hl)/hp
+        diag[-2] = (hp + hl)*(2*hp + hl)/hp
+        superDiag[-2] = 0
+    return subDiag,diag,superDiag,rhs
 
-    # Solve tridiagonal system for coefs(1,i)
+# Thomas algorithm, split so that one factorization serves many right
+# hand sides: mult[i] is the multiplier of row i-1 eliminated from row i
+# and piv[i] the pivot left on the diagonal. The loops run over Python
+# floats, which is several times faster than indexing numpy scalars.
+def thomasFactor(subDiag, diag, superDiag):
+    sub = subDiag.tolist()
+    sup = superDiag.tolist()
+    piv = diag.tolist()
+    n = len(piv)
+    mult = [0.0]*n
+    for i in range(1,n):
+        mult[i] = sub[i]/piv[i-1]
+        piv[i] = piv[i] - mult[i]*sup[i-1]
+    return np.array(mult),np.array(piv)
+
+# Solve with a factorization from thomasFactor. rhs is (n,) or (n, m); in
+# the second case every step updates one row of m series at once.
+def thomasSolve(mult, piv, superDiag, rhs):
+    rhs = np.asarray(rhs,dtype=float)
+    n = len(piv)
+    if rhs.ndim == 1:
+        r = rhs.tolist()
+        m = mult.tolist()
+        p = piv.tolist()
+        u = superDiag.tolist()
+        for i in range(1,n):
+            r[i] -= m[i]*r[i-1]
+        r[n-1] /= p[n-1]
+        for i in range(n-2,-1,-1):
+            r[i] = (r[i] - u[i]*r[i+1])/p[i]
+        return np.array(r)
+    r = rhs.copy()
     for i in range(1,n):
-        multiplier = -1*subDiag[i]/diag[i-1]
-        diag[i] = diag[i] + multiplier*superDiag[i-1]
-        rhs[i] = rhs[i] + multiplier*rhs[i-1]
-    # set last coeff in second row to be 0
-    coefs[1,-1] = 0
-    for i in range(n-2,0,-1):
-        coefs[1,i] = (rhs[i] - superDiag[i]*coefs[1,i+1])/diag[i]
-    coefs[1,0] = 0
+        r[i] -= mult[i]*r[i-1]
+    r[n-1] /= piv[n-1]
+    for i in range(n-2,-1,-1):
+        r[i] -= superDiag[i]*r[i+1]
+        r[i] /= piv[i]
+    return r
+
+# Remaining coefficients b (coefs[0]) and d (coefs[2]) from c (coefs[1]).
+# y and c may be stacked (..., n); coefs is then (..., 3, n).
+def splineCoefs(x, y, c):
+    x = np.asarray(x,dtype=float)
+    y = np.asarray(y,dtype=float)
+    n = input_sz(x)
+    coefs = np.zeros(shape=y.shape[:-1]+(3,n))
+    delta = np.diff(x)
+    coefs[...,1,:] = c
+    coefs[...,0,:-1] = np.diff(y)/delta - delta*(2*c[...,:-1] + c[...,1:])/3
+    coefs[...,2,:-1] = np.diff(c)/(3*delta)
+    return coefs
+
+# Factor the bands of splineBands once per knot vector.
+# The periodic matrix is T + u v^T with T tridiagonal, u = (g,0..0,alpha),
+# v = (1,0..0,beta/g) (Sherman-Morrison): T is factored and z = T^-1 u kept,
+# so every solve is still O(n).
+def splineFactor(subDiag, diag, superDiag, bc='natural'):
+    z = v = None
+    if bc == 'periodic':
+        m = len(diag)
+        beta = subDiag[0]
+        alpha = superDiag[-1]
+        g = -diag[0]
+        subDiag = subDiag.copy()
+        diag = diag.copy()
+        superDiag = superDiag.copy()
+        subDiag[0] = 0
+        superDiag[-1] = 0
+        diag[0] -= g
+        diag[-1] -= alpha*beta/g
+        u = np.zeros(m)
+        u[0] = g
+        u[-1] = alpha
+        v = np.zeros(m)
+        v[0] = 1
+        v[-1] = beta/g
+    mult,piv = thomasFactor(subDiag,diag,superDiag)
+    if bc == 'periodic':
+        z = thomasSolve(mult,piv,superDiag,u)
+    return SplineFactor(bc,mult,piv,superDiag,z,v)
+
+# c = coefs[1,:] for the right hand side rhs of splineBands, shape (n,) or
+# (n, m), with the end values the boundary condition implies
+def splineSolve(factor, x, rhs):
+    x = np.asarray(x,dtype=float)
+    c = thomasSolve(factor.mult,factor.piv,factor.superDiag,rhs)
+    if factor.bc == 'natural':
+        c[0] = 0
+        c[-1] = 0
+    elif factor.bc == 'not-a-knot':
+        h = np.diff(x)
+        c[0] = ((h[0] + h[1])*c[1] - h[0]*c[2])/h[1]
+        c[-1] = ((h[-2] + h[-1])*c[-2] - h[-1]*c[-3])/h[-2]
+    elif factor.bc == 'periodic':
+        vc = factor.v[0]*c[0] + factor.v[-1]*c[-1]
+        vz = factor.v[0]*factor.z[0] + factor.v[-1]*factor.z[-1]
+        z = factor.z if c.ndim == 1 else factor.z[:,None]
+        c = c - z*(vc/(1 + vz))
+        c = np.concatenate([c,c[:1]],axis=0)
+    return c
+
+# Set up cubic spline coefficients.
+# The tridiagonal system is assembled with slicing and solved in O(n) with
+# the Thomas algorithm, so 10^6 knots take about a second. bc is one of
+# BOUNDARY (slopes = end derivatives for 'clamped'). With debug=True the
+# bands and the coefficients are printed as before.
+def cubicSplineSetup(x, y, debug=False, bc='natural', slopes=(0,0)):
+    subDiag,diag,superDiag,rhs = splineBands(x, y, bc, slopes)
+    if debug:
+        print("superDiag =",superDiag)
+        print("diag =",diag)
+        print("subDiag =",subDiag)
+        print("rhs =",rhs)
+
+    # Solve tridiagonal system for coefs(1,i)
+    factor = splineFactor(subDiag,diag,superDiag,bc)
+    c = splineSolve(factor,x,rhs)
 
     # solve for remaining coefficients
-    for i in range(n-1):
-        delta = x[i+1] - x[i]
-        coefs[0,i] = (y[i+1]-y[i])/delta - delta*(2*coefs[1,i] + coefs[1,i+1])/3
-        coefs[2,i] = (coefs[1,i+1]-coefs[1,i])/(3*delta)
-    print("Spline Coefficients")
-    print("b =",coefs[0,:-1])
-    print("c =",coefs[1,:-1])
-    print("d =",coefs[2,:-1])
+    coefs = splineCoefs(x, y, c)
+    if debug:
+        print("Spline Coefficients")
+        print("b =",coefs[0,:-1])
+        print("c =",coefs[1,:-1])
+        print("d =",coefs[2,:-1])
     return coefs
 
 #### THE FOLLOWING SHOWS BASIC USAGE
@@ -119,4 +371,22 @@ def cubicSplineSetup(x, y):
 ##  y = [3,-2,1]
 ##  cubicSpline(x,y)
 #### to turn off plotting 
-##  cubicSpline(x,y,False)
\ No newline at end of file
+##  cubicSpline(x,y,False)
+#### print the tridiagonal system and the coefficients
+##  cubicSplineSetup(x,y,debug=True)
+#### other end conditions
+##  cubicSplineSetup(x,np.sin(x),bc='clamped',slopes=(np.cos(x[0]),np.cos(x[-1])))
+##  cubicSplineSetup(x,y,bc='not-a-knot')
+##  cubicSplineSetup(t,np.cos(t),bc='periodic')     # t spans whole periods
+#### evaluate at many points at once (only the values)
+##  coefs = cubicSplineSetup(x,y)
+##  [val] = cubicSplineEvalArray(np.linspace(0,2,10**6),x,y,coefs,orders=(0,))
+#### repeated evaluation: classify the knots once (uniform / bucket index)
+##  locate = IntervalLocator(x,buckets=len(x))
+##  [val] = cubicSplineEvalArray(t,x,y,coefs,orders=(0,),locate=locate)
+##  locate(np.nan)       # non-finite points: same index as searchsorted
+#### check against searchsorted just beside non-uniform knots
+##  x = np.delete(np.arange(501)*0.01,np.arange(5,500,10))     # 0.01 grid, 50 samples dropped
+##  locate = IntervalLocator(x,buckets=len(x)-1)
+##  for t in (np.nextafter(x,-np.inf),np.nextafter(x,np.inf)):
+##      assert np.array_equal(locate(t),np.clip(np.searchsorted(x,t,side='right')-1,0,len(x)-2))
\ No newline at end of file
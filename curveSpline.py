@@ -0,0 +1,121 @@
+# Parametric Cubic Spline Curves in 2D/3D
+#
+# A curve through points P_0..P_{n-1} (rows of an (n, dim) array) is one
+# cubic spline per coordinate over a common parameter u, by default the
+# cumulative chord length. All coordinates share the knots, so they are
+# fitted together as a SplineSet (one factorization, coefs (dim, 3, n)).
+#
+# Arc length: on segment i the speed |P'(u)| is integrated with QUAD-point
+# Gauss-Legendre quadrature, and the cumulative table S[i] = length from
+# P_0 to P_i is kept. A point at distance s along the curve is then found
+# by a binary search of S for the segment and a few Newton steps on
+#   L_i(tt) = integral_0^tt |P'| = s - S[i],   L_i' = |P'|
+# for all the distances at once.
+#
+#  curve = CurveSpline(points)
+#  curve(u)                  positions at parameters u, shape u.shape + (dim,)
+#  curve.length              total arc length
+#  curve.atDistance(s)       positions at arc lengths s
+
+import numpy as np
+from splineSet import SplineSet
+
+############################## VARIABLES #############################
+QUAD = 5          # Gauss-Legendre points per segment
+NEWTON_ITERS = 8
+############################## FUNCTIONS #############################
+
+class CurveSpline:
+    def __init__(self,points,u=None,bc='natural',quad=QUAD):
+        P = np.asarray(points,dtype=float)
+        if P.ndim != 2 or P.shape[0] < 2:
+            raise ValueError("ERROR CODE 1: points must be an (n, dim) array with n >= 2")
+        if u is None:
+            u = np.concatenate([[0.0],np.cumsum(np.sqrt(np.sum(np.diff(P,axis=0)**2,axis=1)))])
+        self.spline = SplineSet(u,P.T,bc=bc)
+        self.u = self.spline.x
+        self.points = P
+        self.dim = P.shape[1]
+        self._nodes,self._weights = np.polynomial.legendre.leggauss(quad)
+        # arc length of every segment and the cumulative table
+        h = np.diff(self.u)
+        tt = 0.5*h[:,None]*(1 + self._nodes)
+        b,c,d = self._segment(np.arange(len(h))[:,None])
+        seg = 0.5*h*np.sum(self._weights*self._speed(b,c,d,tt),axis=1)
+        self.S = np.concatenate([[0.0],np.cumsum(seg)])
+
+    @property
+    def length(self):
+        return self.S[-1]
+
+    # coefficients b, c, d of segments i, shape (dim,) + i.shape
+    def _segment(self,i):
+        C = self.spline.coefs
+        return C[:,0,i],C[:,1,i],C[:,2,i]
+
+    # |P'| at offset tt into the segments of b, c, d (arrays broadcast)
+    def _speed(self,b,c,d,tt):
+        v = b + tt*(2*c + tt*3*d)
+        return np.sqrt(np.sum(v*v,axis=0))
+
+    # positions (0), tangents (1) or second derivatives (2) at parameters
+    # u, as a list in the order requested, each of shape u.shape + (dim,).
+    # u is clipped to [u[0], u[-1]]: the ends of a curve are points of it,
+    # with the one-sided derivatives of the end segments (SplineSet would
+    # give the derivatives of its constant extension there, 0).
+    def evaluate(self,u,orders=(0,)):
+        u = np.clip(np.asarray(u,dtype=float),self.u[0],self.u[-1])
+        i = self.spline.interval(u)
+        tt = u - self.u[i]
+        b,c,d = self._segment(i)
+        out = []
+        for order in orders:
+            if order == 0:
+                r = self.spline.y[:,i] + tt*(b + tt*(c + tt*d))
+            elif order == 1:
+                r = b + tt*(2*c + tt*3*d)
+            elif order == 2:
+                r = 2*c + tt*6*d
+            else:
+                raise ValueError("orders must be 0 (position), 1 (tangent) or 2 (second derivative)")
+            out.append(np.moveaxis(r,0,-1))
+        return out
+
+    def __call__(self,u):
+        return self.evaluate(u)[0]
+
+    # parameter u at arc lengths s (clipped to [0, length])
+    def parameterAt(self,s):
+        s = np.clip(np.asarray(s,dtype=float),0,self.length)
+        n = len(self.u)
+        i = np.clip(np.searchsorted(self.S,s,side='right') - 1,0,n-2)
+        h = self.u[i+1] - self.u[i]
+        target = s - self.S[i]
+        seg = self.S[i+1] - self.S[i]
+        with np.errstate(divide='ignore',invalid='ignore'):
+            tt = np.where(seg > 0,h*target/seg,0.0)
+        b,c,d = self._segment(i)
+        bq,cq,dq = b[...,None],c[...,None],d[...,None]
+        for _ in range(NEWTON_ITERS):
+            # L_i(tt) by Gauss-Legendre on [0, tt]
+            nodes = 0.5*tt[...,None]*(1 + self._nodes)
+            L = 0.5*tt*np.sum(self._weights*self._speed(bq,cq,dq,nodes),axis=-1)
+            speed = self._speed(b,c,d,tt)
+            with np.errstate(divide='ignore',invalid='ignore'):
+                step = np.where(speed > 0,(L - target)/speed,0.0)
+            tt = np.clip(tt - step,0,h)
+            if np.all(np.abs(step) <= 1e-14*h):
+                break
+        return self.u[i] + tt
+
+    # positions at arc lengths s, shape s.shape + (dim,)
+    def atDistance(self,s):
+        return self(self.parameterAt(s))
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  theta = np.linspace(0,4*np.pi,60)
+##  helix = np.column_stack([np.cos(theta),np.sin(theta),0.2*theta])
+##  curve = CurveSpline(helix)
+##  curve.length
+##  curve.atDistance(np.linspace(0,curve.length,1000))   # equally spaced along the curve
+##  tangent, = curve.evaluate(curve.parameterAt(2.5),orders=(1,))
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+'''
+ EXPRESSION COMPILER
+
+ Turns a function written as a string of x, e.g. "x - exp(-x)" or
+ "cos(x) - x", into a numpy-vectorized callable together with its symbolic
+ derivative, so the root finders can be given f without editing source.
+
+ The main function is compileExpr:
+
+  kernel = compileExpr(expr)
+
+  Inputs:
+    expr            String expression in the variable x. Numbers, + - * / **
+                    (^ is read as **), pi, e and the functions in FUNCTIONS
+                    are allowed; anything else is rejected.
+  Outputs:
+    kernel.expr     The normalized expression (used as the cache key)
+    kernel.f        Vectorized callable f(x)
+    kernel.dexpr    The derivative as a normalized expression string
+    kernel.df       Vectorized callable df(x)
+
+ Compiled kernels are kept in an LRU cache keyed on the normalized
+ expression, so "x-exp(-x)" and "x - exp( -x )" share one kernel.
+'''
+import ast
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+
+############################## VARIABLES #############################
+Kernel = namedtuple("Kernel",["expr","f","dexpr","df"])
+CACHE_SIZE = 256
+FUNCTIONS = {
+    "exp": np.exp, "log": np.log, "sqrt": np.sqrt, "cbrt": np.cbrt,
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "arctan": np.arctan, "abs": np.abs, "sign": np.sign,
+}
+CONSTANTS = {"pi": np.pi, "e": np.e}
+_BINOPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+############################## FUNCTIONS #############################
+
+# Reject anything that is not a plain expression of x
+class _Normalizer(ast.NodeTransformer):
+    def visit_BinOp(self,node):
+        self.generic_visit(node)
+        if not isinstance(node.op,_BINOPS):
+            raise ValueError("operator %s is not allowed" % type(node.op).__name__)
+        return node
+
+    def visit_UnaryOp(self,node):
+        self.generic_visit(node)
+        if not isinstance(node.op,(ast.USub,ast.UAdd)):
+            raise ValueError("operator %s is not allowed" % type(node.op).__name__)
+        return node
+
+    def visit_Call(self,node):
+        if not (isinstance(node.func,ast.Name) and node.func.id in FUNCTIONS):
+            raise ValueError("unknown function in %r" % ast.unparse(node))
+        if len(node.args) != 1 or node.keywords:
+            raise ValueError("%s takes exactly one argument" % node.func.id)
+        node.args = [self.visit(node.args[0])]
+        return node
+
+    def visit_Name(self,node):
+        if node.id != "x" and node.id not in CONSTANTS:
+            raise ValueError("unknown name %r" % node.id)
+        return node
+
+    def visit_Constant(self,node):
+        if not isinstance(node.value,(int,float)) or isinstance(node.value,bool):
+            raise ValueError("constant %r is not a number" % (node.value,))
+        return node
+
+    def generic_visit(self,node):
+        if not isinstance(node,(ast.Expression,ast.BinOp,ast.UnaryOp,ast.Call,
+                                ast.Name,ast.Constant,ast.Load,ast.operator,ast.unaryop)):
+            raise ValueError("%s is not allowed in an expression" % type(node).__name__)
+        return super().generic_visit(node)
+
+# ^ is replaced textually so that x^2 - 2 keeps the precedence of x**2 - 2
+def normalize(expr):
+    try:
+        tree = ast.parse(expr.strip().replace("^","**"),mode="eval")
+    except SyntaxError as err:
+        raise ValueError("cannot parse %r: %s" % (expr,err.msg)) from None
+    tree = _Normalizer().visit(tree)
+    return ast.unparse(tree.body)
+
+############################ DIFFERENTIATION ##########################
+def _num(v):
+    return ast.Constant(value=v)
+
+def _isnum(node,v=None):
+    return isinstance(node,ast.Constant) and (v is None or node.value == v)
+
+def _call(name,arg):
+    return ast.Call(func=ast.Name(id=name,ctx=ast.Load()),args=[arg],keywords=[])
+
+def _hasx(node):
+    return any(isinstance(n,ast.Name) and n.id == "x" for n in ast.walk(node))
+
+# Build binary operations with the obvious 0/1 simplifications
+def _add(a,b):
+    if _isnum(a,0): return b
+    if _isnum(b,0): return a
+    return ast.BinOp(left=a,op=ast.Add(),right=b)
+
+def _sub(a,b):
+    if _isnum(b,0): return a
+    if _isnum(a,0): return _neg(b)
+    if isinstance(b,ast.UnaryOp) and isinstance(b.op,ast.USub): return _add(a,b.operand)
+    return ast.BinOp(left=a,op=ast.Sub(),right=b)
+
+def _mul(a,b):
+    if _isnum(a,0) or _isnum(b,0): return _num(0)
+    if _isnum(a,1): return b
+    if _isnum(b,1): return a
+    if _isnum(a,-1): return _neg(b)
+    if _isnum(b,-1): return _neg(a)
+    return ast.BinOp(left=a,op=ast.Mult(),right=b)
+
+def _div(a,b):
+    if _isnum(a,0): return _num(0)
+    if _isnum(b,1): return a
+    return ast.BinOp(left=a,op=ast.Div(),right=b)
+
+def _pow(a,b):
+    if _isnum(b,1): return a
+    if _isnum(b,0): return _num(1)
+    return ast.BinOp(left=a,op=ast.Pow(),right=b)
+
+def _neg(a):
+    if _isnum(a,0): return a
+    if _isnum(a): return _num(-a.value)
+    return ast.UnaryOp(op=ast.USub(),operand=a)
+
+# d/dx of the argument u for each function: returns g'(u) so d g(u) = g'(u) u'
+_DERIVATIVES = {
+    "exp":    lambda u: _call("exp",u),
+    "log":    lambda u: _div(_num(1),u),
+    "sqrt":   lambda u: _div(_num(0.5),_call("sqrt",u)),
+    "cbrt":   lambda u: _div(_num(1),_mul(_num(3),_pow(_call("cbrt",u),_num(2)))),
+    "sin":    lambda u: _call("cos",u),
+    "cos":    lambda u: _neg(_call("sin",u)),
+    "tan":    lambda u: _div(_num(1),_pow(_call("cos",u),_num(2))),
+    "sinh":   lambda u: _call("cosh",u),
+    "cosh":   lambda u: _call("sinh",u),
+    "tanh":   lambda u: _div(_num(1),_pow(_call("cosh",u),_num(2))),
+    "arctan": lambda u: _div(_num(1),_add(_num(1),_pow(u,_num(2)))),
+    "abs":    lambda u: _call("sign",u),
+    "sign":   lambda u: _num(0),
+}
+
+def _diff(node):
+    if not _hasx(node):
+        return _num(0)
+    if isinstance(node,ast.Name):
+        return _num(1)
+    if isinstance(node,ast.UnaryOp):
+        d = _diff(node.operand)
+        return _neg(d) if isinstance(node.op,ast.USub) else d
+    if isinstance(node,ast.Call):
+        u = node.args[0]
+        return _mul(_DERIVATIVES[node.func.id](u),_diff(u))
+    u,v = node.left,node.right
+    du,dv = _diff(u),_diff(v)
+    if isinstance(node.op,ast.Add):
+        return _add(du,dv)
+    if isinstance(node.op,ast.Sub):
+        return _sub(du,dv)
+    if isinstance(node.op,ast.Mult):
+        return _add(_mul(du,v),_mul(u,dv))
+    if isinstance(node.op,ast.Div):
+        return _div(_sub(_mul(du,v),_mul(u,dv)),_pow(v,_num(2)))
+    # power rule; general case u^v = exp(v log u)
+    if not _hasx(v):
+        exponent = _num(v.value - 1) if _isnum(v) else _sub(v,_num(1))
+        return _mul(_mul(v,_pow(u,exponent)),du)
+    return _mul(node,_add(_mul(dv,_call("log",u)),_div(_mul(v,du),u)))
+
+def derivative(expr):
+    tree = ast.parse(normalize(expr),mode="eval")
+    return ast.unparse(_diff(tree.body))
+
+############################## COMPILER ##############################
+# Constant expressions (e.g. a derivative) still return an array shaped like x
+def _full(x,value):
+    return np.full(np.shape(x),value,dtype=np.result_type(np.asarray(x).dtype,float))
+
+_NAMESPACE = {"__builtins__": {}, "_full": _full, **FUNCTIONS, **CONSTANTS}
+
+def _lambda(expr):
+    body = expr if _hasx(ast.parse(expr,mode="eval")) else "_full(x, %s)" % expr
+    return eval(compile("lambda x: " + body,"<expr %s>" % expr,"eval"),_NAMESPACE)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compileNormalized(expr):
+    dexpr = ast.unparse(_diff(ast.parse(expr,mode="eval").body))
+    return Kernel(expr,_lambda(expr),dexpr,_lambda(dexpr))
+
+def compileExpr(expr):
+    return _compileNormalized(normalize(expr))
+
+def cacheInfo():
+    return _compileNormalized.cache_info()
+
+def clearCache():
+    _compileNormalized.cache_clear()
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  k = compileExpr("x - exp(-x)")
+##  k.f(np.linspace(0,1,5))
+##  k.dexpr                   # '1 + exp(-x)'
+#### the commented alternatives in bisection2.py
+##  compileExpr("cos(x) - x")
+##  compileExpr("x^2 - 2")
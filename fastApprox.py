@@ -0,0 +1,152 @@
+# Table-Driven Function Approximation
+#
+# Generalizes domain_cos() of HW8/newtonDD3.py: the argument is reduced into
+# a short interval with the symmetries of f, and f is replaced there by a
+# table of piecewise polynomials, each the degree-d Chebyshev interpolant
+# of f on its piece. The number of pieces is doubled until the error on a
+# dense check grid meets the target.
+#
+# Symmetries understood by the range reduction:
+#   period   f(x + P) = f(x)             x -> x mod P, into [0,P)
+#   parity   f(-x) = +-f(x)              ('even' or 'odd') into [0,P/2]
+#   reflect  f(P/2 - x) = reflect*f(x)   (+1 or -1) into [0,P/4]
+# cos is (2pi, 'even', -1) and sin is (2pi, 'odd', +1), both reduced to
+# [0,pi/2] as in domain_cos(). Without a period the table covers domain=(a,b)
+# (or [0,b] for a parity), and arguments outside it are extrapolated.
+
+import time
+import numpy as np
+from numpy.polynomial import chebyshev
+from newtonInterp import chebyshev_nodes
+from chebInterp import chebCoefs
+
+############################## VARIABLES #############################
+CHECK_POINTS = 33      # check grid points per piece
+MAX_PIECES = 2**16
+############################## FUNCTIONS #############################
+
+class FastApprox:
+    def __init__(self,f,tol,period=None,parity=None,reflect=None,domain=None,degree=7):
+        if parity not in (None,'even','odd'):
+            raise ValueError("parity must be 'even', 'odd' or None")
+        if period is None and domain is None:
+            raise ValueError("give a period or a domain")
+        self.f = f
+        self.tol = tol
+        self.period = period
+        self.parity = parity
+        self.reflect = reflect if period is not None else None
+        self.degree = degree
+
+        # reduced interval [lo, hi]
+        if period is not None:
+            self.lo,self.hi = 0.0,float(period)
+            if parity is not None:
+                self.hi /= 2
+                if reflect is not None:
+                    self.hi /= 2
+        else:
+            self.lo,self.hi = float(domain[0]),float(domain[1])
+            if parity is not None:
+                self.lo = 0.0
+        self._build()
+
+    # Double the number of pieces until the check grid meets tol
+    def _build(self):
+        d = self.degree
+        s = chebyshev_nodes(d+1,-1,1)
+        check = np.linspace(-1,1,CHECK_POINTS)
+        # row k holds the monomial coefficients of T_k
+        toPoly = np.zeros((d+1,d+1))
+        for k in range(d+1):
+            toPoly[k,:k+1] = chebyshev.cheb2poly(np.eye(d+1)[k])[:k+1]
+        m = 1
+        while True:
+            h = (self.hi - self.lo)/m
+            centers = self.lo + h*(np.arange(m) + 0.5)
+            values = self.f(centers[:,None] + 0.5*h*s[None,:])
+            table = chebCoefs(values) @ toPoly      # (m, d+1) monomials in s
+            self.pieces = m
+            self._h = h
+            self._invh = 1/h
+            self._table = np.ascontiguousarray(table.T)   # one row per power
+            grid = (centers[:,None] + 0.5*h*check[None,:]).ravel()
+            self.maxError = float(np.max(np.abs(self._poly(grid) - self.f(grid))))
+            if self.maxError <= self.tol or m >= MAX_PIECES:
+                return
+            m *= 2
+
+    # Vectorized range reduction: returns the reduced argument and the sign.
+    # Folding about c is done as c - |u - c|; the sign of a fold that flips
+    # f is sign(c - u), which is 0 exactly where such an f vanishes.
+    def reduce(self,x):
+        x = np.asarray(x,dtype=float)
+        sign = None
+        if self.period is not None:
+            P = self.period
+            u = np.remainder(x,P,out=np.empty_like(x))
+            if self.parity is not None:
+                if self.parity == 'odd':
+                    sign = np.sign(P/2 - u)
+                u -= P/2
+                np.abs(u,out=u)
+                np.subtract(P/2,u,out=u)
+                if self.reflect is not None:
+                    if self.reflect < 0:
+                        flip = np.sign(P/4 - u)
+                        sign = flip if sign is None else sign*flip
+                    u -= P/4
+                    np.abs(u,out=u)
+                    np.subtract(P/4,u,out=u)
+        else:
+            u = x
+            if self.parity is not None:
+                if self.parity == 'odd':
+                    sign = np.sign(x)
+                u = np.abs(x)
+        return u,(np.ones_like(u) if sign is None else sign)
+
+    # Piecewise polynomial on the reduced interval
+    def _poly(self,u):
+        r = (u - self.lo)*self._invh
+        idx = np.clip(r.astype(np.intp),0,self.pieces-1)
+        s = 2*(r - idx) - 1
+        T = self._table
+        value = T[self.degree][idx]
+        for k in range(self.degree-1,-1,-1):
+            value *= s
+            value += T[k][idx]
+        return value
+
+    def __call__(self,x):
+        u,sign = self.reduce(x)
+        value = self._poly(u)
+        if self.parity == 'odd' or (self.reflect is not None and self.reflect < 0):
+            value *= sign
+        return value
+
+# Time approx against the reference function on x and report the max error
+def benchmark(approx,ref,x,repeats=5):
+    times = {}
+    for name,func in (("reference",ref),("table",approx)):
+        best = np.inf
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func(x)
+            best = min(best,time.perf_counter() - start)
+        times[name] = best
+    err = np.max(np.abs(approx(x) - ref(x)))
+    print("{:>10} {:>12} {:>14}".format("","time [s]","points/s"))
+    for name,best in times.items():
+        print("{:>10} {:12.6f} {:14.6g}".format(name,best,x.size/best))
+    print("pieces = %d, degree = %d, max error = %.6e (target %.1e)" % (
+        approx.pieces,approx.degree,err,approx.tol))
+    return times,err
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  fcos = FastApprox(np.cos,1e-12,period=2*np.pi,parity='even',reflect=-1)
+##  x = np.linspace(-1000,1000,10**6)
+##  fcos(x)
+##  benchmark(fcos,np.cos,x)
+#### no symmetry: a table on a fixed interval
+##  fexp = FastApprox(np.exp,1e-10,domain=(0,1),degree=5)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+'''
+ SOLVER INSTRUMENTATION
+
+ Collects what the solvers used to print when debug was set, without
+ formatting anything on the hot path. A Monitor is passed to a solver as
+ monitor=...; with monitor=None the solvers skip every hook, so the cost of
+ having the hooks is one "is None" test per iteration.
+
+  monitor = Monitor(callback=None, record=True)
+
+  Inputs:
+    callback        Optional function called after every iteration as
+                    callback(solver, record), record a dict of the fields
+    record          Keep an array-backed trace of every iteration
+  Collected:
+    monitor.calls   Number of calls of each counted function ('f', 'df', ...)
+    monitor.points  Number of points those calls evaluated (differs from
+                    calls for the batched solvers)
+    monitor.times   Wall time in seconds per phase ('solve', 'float32', ...)
+    monitor.trace   TraceRecorder of the last solve, exported with
+                    toNumpy(), save() or toJSON()
+ Everything is collected per solve: start() clears it when the monitor is
+ passed to another solver call.
+'''
+import functools
+import inspect
+import json
+import time
+from contextlib import contextmanager
+import numpy as np
+
+############################## FUNCTIONS #############################
+
+# Growable 2D float64 buffer, one row per iteration and one column per field
+class TraceRecorder:
+    def __init__(self,fields,capacity=64):
+        self.fields = tuple(fields)
+        self._data = np.empty((capacity,len(self.fields)))
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def append(self,values):
+        if self._n == self._data.shape[0]:
+            grown = np.empty((2*self._n,len(self.fields)))
+            grown[:self._n] = self._data
+            self._data = grown
+        self._data[self._n] = values
+        self._n += 1
+
+    def column(self,name):
+        return self._data[:self._n,self.fields.index(name)]
+
+    # errors against a known true solution, as the homework scripts report
+    def errors(self,x_true,field="x"):
+        return np.abs(self.column(field) - x_true)
+
+    def toNumpy(self):
+        dtype = [(name,np.float64) for name in self.fields]
+        return np.rec.fromarrays(self._data[:self._n].T,dtype=dtype)
+
+    def save(self,path):
+        np.save(path,self.toNumpy())
+
+    def toDict(self):
+        return {name: self.column(name).tolist() for name in self.fields}
+
+    def toJSON(self):
+        return json.dumps(self.toDict())
+
+class Monitor:
+    def __init__(self,callback=None,record=True):
+        self.callback = callback
+        self.record = record
+        self.solver = None
+        self.fields = ()
+        self.trace = None
+        self.calls = {}
+        self.points = {}
+        self.times = {}
+
+    def reset(self):
+        self.solver = None
+        self.fields = ()
+        self.trace = None
+        self.calls.clear()
+        self.points.clear()
+        self.times.clear()
+
+    # called by a solver before its first iteration; a monitor reused for
+    # another solve starts over, so trace, counts and times are per solve
+    def start(self,solver,fields):
+        self.solver = solver
+        self.fields = tuple(fields)
+        self.trace = TraceRecorder(fields) if self.record else None
+        self.calls.clear()
+        self.points.clear()
+        self.times.clear()
+
+    # called by a solver once per iteration with one value per field
+    def iteration(self,*values):
+        if self.trace is not None:
+            self.trace.append(values)
+        if self.callback is not None:
+            self.callback(self.solver,dict(zip(self.fields,values)))
+
+    # wrap f so that every call is counted under name
+    def counted(self,func,name):
+        self.calls.setdefault(name,0)
+        self.points.setdefault(name,0)
+        def wrapper(x):
+            self.calls[name] += 1
+            self.points[name] += np.size(x)
+            return func(x)
+        return wrapper
+
+    @contextmanager
+    def phase(self,name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name,0.0) + time.perf_counter() - start
+
+    def summary(self):
+        return {"solver": self.solver, "iterations": len(self.trace) if self.trace is not None else None,
+                "calls": dict(self.calls), "points": dict(self.points), "times": dict(self.times)}
+
+    def toJSON(self):
+        out = self.summary()
+        out["trace"] = self.trace.toDict() if self.trace is not None else None
+        return json.dumps(out)
+
+# Callback that reproduces the old per-iteration debug lines
+def printer(prec=12):
+    def callback(solver,record):
+        items = ", ".join("%s = %.*g" % (k,prec,v) for k,v in record.items() if k != "iter")
+        print("%s iter %d: %s" % (solver,record["iter"],items))
+    return callback
+
+# Decorator that attaches a Monitor to a solver with 'debug' and 'monitor'
+# parameters. Without either the solver is called untouched. Otherwise the
+# functions named in funcs are counted, the solve is timed as phase 'solve'
+# and debug=True without a monitor prints every iteration.
+def instrumented(solver,fields,funcs=("f",)):
+    def decorate(solve):
+        params = list(inspect.signature(solve).parameters)
+        iDebug = params.index("debug")
+        iMonitor = params.index("monitor")
+        iFuncs = [(name,params.index(name)) for name in funcs]
+
+        def get(args,kwargs,name,i,default=None):
+            return args[i] if len(args) > i else kwargs.get(name,default)
+
+        def put(args,kwargs,name,i,value):
+            if len(args) > i:
+                args[i] = value
+            else:
+                kwargs[name] = value
+
+        @functools.wraps(solve)
+        def wrapper(*args,**kwargs):
+            monitor = get(args,kwargs,"monitor",iMonitor)
+            if monitor is None:
+                if not get(args,kwargs,"debug",iDebug,False):
+                    return solve(*args,**kwargs)
+                monitor = Monitor(callback=printer(),record=False)
+            args = list(args)
+            put(args,kwargs,"monitor",iMonitor,monitor)
+            monitor.start(solver,fields)
+            for name,i in iFuncs:
+                func = get(args,kwargs,name,i)
+                if callable(func):
+                    put(args,kwargs,name,i,monitor.counted(func,name))
+            with monitor.phase("solve"):
+                return solve(*args,**kwargs)
+        return wrapper
+    return decorate
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  from rootFinders import newton
+##  m = Monitor()
+##  [s,x,iters] = newton(f,df,1.0,1e-12,50,monitor=m)
+##  m.calls, m.times             # {'f': .., 'df': ..}, {'solve': ..}
+##  m.trace.errors(x_true)       # the old errors array
+##  m.trace.save("newton.npy"); m.toJSON()
+#### print every iteration, as debug=True used to
+##  m = Monitor(callback=printer())
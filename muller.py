@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+'''
+ MULLER'S METHOD
+
+ Solves the problem f(z)=0 for real or complex roots using Muller's method.
+ Each step fits a quadratic through the last three iterates and moves to the
+ root of that quadratic closest to the newest iterate, so no derivative is
+ needed and complex roots are reached even from real starting points.
+
+ The method runs on whole arrays of starting triples at once: f is called on
+ the array of lanes that have not converged yet, once per iteration.
+
+ The main function is muller:
+
+  [state,z,iters] = muller(f, x0, x1, x2, tolerance, maxIteration, debug, monitor)
+
+  Inputs:
+    f               The function for which a root is sought. It must accept
+                    a complex numpy array and return an array of the same shape.
+    x0,x1,x2        The three starting guesses (scalars or arrays of equal shape).
+    tolerance       The convergence tolerance (must be > 0).
+    maxIteration    The maximum number of iterations that can be taken.
+    debug           Boolean to set debugging output
+    monitor         Optional instrument.Monitor; one trace row per iteration
+                    with the number of active lanes and the largest |dx|
+  Outputs:
+    z               Complex array with the root found in each lane
+    iters           Array with the number of iterations taken in each lane
+  Return:
+    state           Array of error status codes, one per lane.
+      SUCCESS       Sucessful termination.
+      WONT_STOP     Error: Exceeded maximum number of iterations.
+      BAD_ITERATE   Error: The interpolating quadratic was degenerate.
+'''
+import numpy as np
+from instrument import instrumented
+
+############################## VARIABLES #############################
+SUCCESS = 0
+WONT_STOP = 1
+BAD_ITERATE = 2
+############################## FUNCTIONS #############################
+
+# Vectorized quadratic formula for a*x^2 + b*x + c = 0 in complex arithmetic.
+# As in quadratic.py, the sign of sqrt(D) is matched to b so that b+sqrt(D)
+# never cancels; r2 = -2c/(b+sqrt(D)) is then the root of smaller magnitude
+# and stays finite when a = 0.
+def quadraticFormula(a,b,c):
+    a = np.asarray(a,dtype=complex)
+    b = np.asarray(b,dtype=complex)
+    c = np.asarray(c,dtype=complex)
+    sqrtD = np.sqrt(b*b - 4*a*c)
+    # pick the sign of sqrt(D) that makes |b + sqrt(D)| largest
+    sqrtD = np.where((b.conjugate()*sqrtD).real < 0, -sqrtD, sqrtD)
+    q = b + sqrtD
+    with np.errstate(divide='ignore',invalid='ignore'):
+        r1 = -q/(2*a)
+        r2 = -2*c/q
+    return r1,r2
+
+@instrumented("muller",("iter","active","maxdx"))
+def muller(f,x0,x1,x2,TOL,MAX_ITERS,debug=False,monitor=None):
+    global SUCCESS, WONT_STOP, BAD_ITERATE
+    x0,x1,x2 = np.broadcast_arrays(*(np.asarray(v,dtype=complex) for v in (x0,x1,x2)))
+    shape = x0.shape
+    x0 = x0.ravel().copy()
+    x1 = x1.ravel().copy()
+    x2 = x2.ravel().copy()
+    f0 = np.asarray(f(x0),dtype=complex)
+    f1 = np.asarray(f(x1),dtype=complex)
+    f2 = np.asarray(f(x2),dtype=complex)
+
+    z = x2.copy()
+    state = np.full(z.size,WONT_STOP)
+    iters = np.full(z.size,MAX_ITERS)
+    lanes = np.arange(z.size)
+
+    # lanes that start on an exact root are already done
+    done = f2 == 0
+    state[lanes[done]] = SUCCESS
+    iters[lanes[done]] = 0
+    keep = ~done
+    lanes,x0,x1,x2,f0,f1,f2 = (v[keep] for v in (lanes,x0,x1,x2,f0,f1,f2))
+
+    ## Muller Loop
+    for itn in range(1,MAX_ITERS+1):
+        if lanes.size == 0:
+            break
+        h1 = x1 - x0
+        h2 = x2 - x1
+        with np.errstate(divide='ignore',invalid='ignore'):
+            d1 = (f1 - f0)/h1
+            d2 = (f2 - f1)/h2
+            a = (d2 - d1)/(h2 + h1)
+        b = a*h2 + d2
+        _,dx = quadraticFormula(a,b,f2)
+
+        bad = ~np.isfinite(dx)
+        state[lanes[bad]] = BAD_ITERATE
+        iters[lanes[bad]] = itn
+        z[lanes[bad]] = x2[bad]
+
+        x0,x1 = x1,x2
+        f0,f1 = f1,f2
+        x2 = x2 + np.where(bad,0,dx)
+        keep = ~bad
+        if monitor is not None:
+            monitor.iteration(itn,np.count_nonzero(keep),np.max(np.abs(dx[keep]),initial=0))
+        lanes,x0,x1,x2,f0,f1,dx = (v[keep] for v in (lanes,x0,x1,x2,f0,f1,dx))
+        f2 = np.asarray(f(x2),dtype=complex)
+        z[lanes] = x2
+
+        # Check error tolerance
+        conv = (np.abs(dx) <= TOL) | (f2 == 0)
+        state[lanes[conv]] = SUCCESS
+        iters[lanes[conv]] = itn
+        keep = ~conv
+        lanes,x0,x1,x2,f0,f1,f2 = (v[keep] for v in (lanes,x0,x1,x2,f0,f1,f2))
+
+    return state.reshape(shape),z.reshape(shape),iters.reshape(shape)
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  f = lambda z: z**2 + 1
+##  [s,z,iters] = muller(f,0.0,0.5,1.0,1e-12,50,False)
+#### many starting triples at once, e.g. to collect all roots of a polynomial
+##  g = lambda z: 54*z**6 + 45*z**5 - 102*z**4 - 69*z**3 + 35*z**2 + 16*z - 4
+##  x2 = np.exp(2j*np.pi*np.arange(12)/12)
+##  [s,z,iters] = muller(g,0.9*x2,0.95*x2,x2,1e-12,100,False)
@@ -0,0 +1,241 @@
+# Newton Divided Difference Interpolation (library version)
+#
+# The functions of HW7/newtonDD.py and HW8/newtonDD3.py without the plotting
+# MAIN, with the divided difference table built by numpy one level at a time.
+# y may be a stack of datasets sharing the nodes x: shape (..., n), one
+# dataset per row, and the coefficients come back with the same shape.
+
+from math import factorial
+import numpy as np
+
+############################## VARIABLES #############################
+# newtonEvalBatch works on (polynomials, points) blocks of about this many
+# float64 values (256 KiB), small enough to stay in cache during Horner
+BLOCK = 32768
+############################## FUNCTIONS #############################
+
+# Evaluate divided difference interpolant
+def newtonEval(t,coefs,x):
+    n = len(x)
+    coefs = np.asarray(coefs)
+    value = coefs[...,n-1]
+    for i in range(n-2,-1,-1): # same as n-2, n-3, n-4, ..., 0
+        value = value*(t-x[i]) + coefs[...,i]
+    return value
+
+# Evaluate m Newton-form polynomials at k points at once.
+#   coefs   (m, n) coefficients, one polynomial per row
+#   x       (n,) shared nodes or (m, n) nodes per polynomial
+#   t       (k,) evaluation points
+# Returns the dense (m, k) array of values. Horner runs over column blocks
+# of t so that the working block stays in cache.
+def newtonEvalBatch(t,coefs,x,block=BLOCK):
+    coefs = np.atleast_2d(np.asarray(coefs,dtype=float))
+    x = np.asarray(x,dtype=float)
+    t = np.asarray(t,dtype=float).ravel()
+    m,n = coefs.shape
+    # nodes as (m or 1, n, 1) so they broadcast against (m, block)
+    xs = np.broadcast_to(x,(m,n)) if x.ndim == 2 else x[None,:]
+    xs = xs[:,:,None]
+    c = coefs[:,:,None]
+    out = np.empty((m,t.size))
+    step = max(1,block//m)
+    for start in range(0,t.size,step):
+        tb = t[None,start:start+step]
+        value = np.repeat(c[:,n-1],tb.shape[1],axis=1)
+        for i in range(n-2,-1,-1):
+            value *= tb - xs[:,i]
+            value += c[:,i]
+        out[:,start:start+step] = value
+    return out
+
+# Set up divided difference coefficients.
+# Level k of the table is computed from level k-1 for all entries (and all
+# datasets) at once; as in newtonDDsetup, finished entries are overwritten
+# from the bottom so only one array of shape y.shape is used. With
+# overwrite=True and y a float array, that array is y itself.
+def newtonDDsetup(x,y,overwrite=False):
+    x = np.asarray(x,dtype=float)
+    n = len(x)
+    if (np.shape(y)[-1] != n):
+        raise ValueError("ERROR CODE 1: x and y are different sizes")
+    if overwrite and isinstance(y,np.ndarray) and y.dtype.kind == 'f':
+        coefs = y
+    else:
+        coefs = np.array(y,dtype=float)
+
+    # DD higher levels (overwrite lower entries as they are finished)
+    for level in range(1,n): # 1,2,3,4, ... n-1
+        dx = x[level:] - x[:-level]
+        if np.any(dx == 0):
+            raise ValueError("ERROR CODE 2: repeated node in x (see hermiteDDsetup for derivative data)")
+        # the right hand side is evaluated before the assignment, so the
+        # old entries coefs[...,level-1:-1] are still those of level-1
+        coefs[...,level:] = (coefs[...,level:] - coefs[...,level-1:-1])/dx
+    return coefs
+
+# Local Newton interpolation for large sorted data.
+# Each query t uses the k nodes around it: searchsorted finds the interval
+# and the window [start, start+k) is centred on it (shifted at the ends).
+# The k-point divided difference tables of a whole batch of queries are
+# built together, one level at a time, so the cost is O(log n + k^2) per
+# point with no Python loop over points.
+def localNewtonEval(t,x,y,k=4,batch=BLOCK):
+    x = np.asarray(x,dtype=float)
+    y = np.asarray(y,dtype=float)
+    t = np.asarray(t,dtype=float)
+    n = len(x)
+    if (len(y) != n):
+        raise ValueError("ERROR CODE 1: x and y are different sizes")
+    k = min(k,n)
+    tt = t.ravel()
+    out = np.empty(tt.size)
+    offsets = np.arange(k)
+    step = max(1,batch//k)
+    for s in range(0,tt.size,step):
+        tb = tt[s:s+step]
+        start = np.clip(np.searchsorted(x,tb) - k//2,0,n - k)
+        idx = start[:,None] + offsets
+        X = x[idx]
+        C = y[idx]
+        for level in range(1,k):
+            C[:,level:] = (C[:,level:] - C[:,level-1:-1])/(X[:,level:] - X[:,:-level])
+        value = C[:,k-1].copy()
+        for i in range(k-2,-1,-1):
+            value *= tb - X[:,i]
+            value += C[:,i]
+        out[s:s+step] = value
+    return out.reshape(t.shape)
+
+# Set up confluent (Hermite) divided difference coefficients.
+# x are distinct nodes, y the values and derivs = [y', y'', ...] the
+# derivatives at them (each shaped like y, stacked datasets allowed).
+# Every node is repeated m = len(derivs)+1 times in z; where a divided
+# difference spans one repeated node, f[z_i,...,z_i] (k+1 times) = f^(k)(z_i)/k!
+# replaces the quotient. Returns z and coefs; evaluate with newtonEval(t,coefs,z).
+def hermiteDDsetup(x,y,derivs):
+    x = np.asarray(x,dtype=float)
+    n = len(x)
+    m = len(derivs) + 1
+    y = np.asarray(y,dtype=float)
+    derivs = [np.asarray(d,dtype=float) for d in derivs]
+    if (y.shape[-1] != n or any(d.shape != y.shape for d in derivs)):
+        raise ValueError("ERROR CODE 1: x, y and the derivatives are different sizes")
+    if len(np.unique(x)) != n:
+        raise ValueError("ERROR CODE 2: repeated node in x")
+    z = np.repeat(x,m)
+    coefs = np.repeat(y,m,axis=-1)
+    node = np.arange(n*m)//m
+
+    for level in range(1,n*m):
+        dx = z[level:] - z[:-level]
+        same = dx == 0
+        with np.errstate(divide='ignore',invalid='ignore'):
+            new = (coefs[...,level:] - coefs[...,level-1:-1])/dx
+        if level < m:
+            new = np.where(same,derivs[level-1][...,node[level:]]/factorial(level),new)
+        coefs[...,level:] = new
+    return z,coefs
+
+# Chebyshev nodes of the first kind on [a,b], in the order of HW8/newtonDD3.py
+def chebyshev_nodes(n,a,b):
+    k = np.arange(1,n+1)
+    return 0.5*(a + b) + 0.5*(b - a)*np.cos((2*k - 1)*np.pi/(2*n))
+
+# Newton interpolant that grows one node at a time.
+# Only the last diagonal of the divided difference table is kept:
+# diag[k] = f[x_{n-1-k},...,x_{n-1}], so diag[n-1] is the top coefficient.
+# Appending x_n updates it with d'_0 = y_n, d'_k = (d'_{k-1} - d_{k-1})/(x_n - x_{n-k}),
+# which is O(n) time and memory, and d'_n is the new coefficient.
+# That coefficient times prod(t - x_i) is the correction the new node makes,
+# i.e. an estimate of the error of the previous interpolant at t.
+class NewtonInterpolant:
+    def __init__(self,x=(),y=()):
+        self.n = 0
+        self._x = np.empty(8)
+        self._coefs = None
+        self._diag = None
+        for xi,yi in zip(x,y):
+            self.append(xi,yi)
+
+    @property
+    def x(self):
+        return self._x[:self.n]
+
+    @property
+    def coefs(self):
+        return self._coefs[:self.n]
+
+    def _grow(self):
+        cap = 2*len(self._x)
+        x = np.empty(cap)
+        x[:self.n] = self._x[:self.n]
+        self._x = x
+        for name in ("_coefs","_diag"):
+            old = getattr(self,name)
+            new = np.empty((cap,)+old.shape[1:])
+            new[:self.n] = old[:self.n]
+            setattr(self,name,new)
+
+    # add the node (xn, yn); yn may be an array for several series
+    def append(self,xn,yn):
+        yn = np.asarray(yn,dtype=float)
+        if self._coefs is None:
+            self._coefs = np.empty((len(self._x),)+yn.shape)
+            self._diag = np.empty((len(self._x),)+yn.shape)
+        if self.n == len(self._x):
+            self._grow()
+        n = self.n
+        x = self._x
+        if np.any(x[:n] == xn):
+            raise ValueError("ERROR CODE 2: repeated node in x")
+        diag = self._diag
+        prev = yn
+        for k in range(1,n+1):
+            new = (prev - diag[k-1])/(xn - x[n-k])
+            diag[k-1] = prev
+            prev = new
+        diag[n] = prev
+        x[n] = xn
+        self._coefs[n] = prev
+        self.n = n+1
+        return prev
+
+    # the coefficient added by the last append
+    @property
+    def lastCoef(self):
+        return self._coefs[self.n-1]
+
+    # |new term| at t: the error estimate of the interpolant before the last append
+    def errorEstimate(self,t):
+        t = np.asarray(t,dtype=float)
+        w = np.ones_like(t)
+        for xi in self._x[:self.n-1]:
+            w = w*(t - xi)
+        return np.abs(np.multiply.outer(w,self.lastCoef))
+
+    # values at t, shape t.shape + the shape of one y
+    def __call__(self,t):
+        coefs = np.moveaxis(self.coefs,0,-1)
+        t = np.asarray(t,dtype=float)
+        t = t.reshape(t.shape + (1,)*(coefs.ndim-1))
+        return newtonEval(t,coefs,self.x)
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  years = np.array([1994, 1995, 1996, 1997, 1998, 1999, 2000, 2001, 2002, 2003])
+##  production = np.array([67.052, 68.008, 69.803, 72.024, 73.400, 72.063, 74.669, 74.487, 74.065, 76.777])
+##  coefs = newtonDDsetup(years,production)
+##  newtonEval(2010,coefs,years)
+#### many datasets on the same nodes: one row of Y per dataset
+##  coefs = newtonDDsetup(years,Y)          # Y.shape == (m, 10)
+##  newtonEval(2010,coefs,years)            # shape (m,)
+##  newtonEvalBatch(np.linspace(1994,2003,500),coefs,years)   # shape (m, 500)
+#### local cubic interpolation in a large sorted dataset
+##  localNewtonEval(t,x,y,k=4)
+#### Hermite interpolation from values and first derivatives
+##  z,coefs = hermiteDDsetup(x,np.cos(x),[-np.sin(x)])
+##  newtonEval(t,coefs,z)
+#### growing the data one year at a time
+##  p = NewtonInterpolant(years,production)
+##  p.append(2004,78.1)      # returns the new coefficient
+##  p(2010), p.errorEstimate(2010)
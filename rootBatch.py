@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+'''
+ BATCHED ROOT FINDERS
+
+ Solves many problems f(x)=0 at once with Newton's method, the secant method
+ or bisection. Every lane of the input arrays is an independent problem;
+ f (and df) are called once per iteration on the array of lanes that have
+ not converged yet, so f must accept and return numpy arrays.
+
+ The main functions are:
+
+  [state,x,iters] = newtonBatch(f, df, x0, tolerance, maxIteration, debug, precision, monitor)
+  [state,x,iters] = secantBatch(f, g0, g1, tolerance, maxIteration, debug, precision, monitor)
+  [state,x,iters] = bisectionBatch(f, a, b, tolerance, maxIteration, debug, precision, monitor)
+
+  Inputs:
+    f               The function for which a root is sought, or an expression
+                    string such as "x - exp(-x)" (see exprCompile.py)
+    df              The derivative of f (newtonBatch only). May be None when
+                    f is a string; its symbolic derivative is used then.
+    x0 / g0,g1 / a,b  Starting guesses or bracketing intervals, one per lane
+    tolerance       The convergence tolerance (must be > 0).
+    maxIteration    The maximum number of iterations that can be taken.
+    debug           Boolean to set debugging output
+    precision       'float64' (default), 'float32' or 'mixed'.
+                    'mixed' iterates in float32 until a lane is near
+                    convergence and then polishes it in float64, which
+                    normally takes one or two float64 steps per lane.
+                    'float32' stops at float32 resolution and is only
+                    meant for comparison.
+    monitor         Optional instrument.Monitor. Its trace has one row per
+                    iteration (iter, bits, active lanes, max |dx|); mixed
+                    runs also time the 'float32' and 'float64' phases.
+  Outputs:
+    x               Array with the root found in each lane
+    iters           Array with the number of iterations taken in each lane
+  Return:
+    state           Array of error status codes, one per lane.
+      SUCCESS       Sucessful termination.
+      WONT_STOP     Error: Exceeded maximum number of iterations.
+      BAD_DATA      Error: The interval may not bracket a root (bisection)
+      BAD_ITERATE   Error: Vanishing derivative or secant slope
+
+ comparePrecision() runs one method in all three precisions and prints
+ accuracy and throughput side by side.
+
+ runJobFile() runs a JSON job file, a list of objects such as
+   {"method": "newton", "f": "x - exp(-x)", "x0": [0, 1, 2],
+    "tol": 1e-12, "maxIter": 50, "precision": "mixed"}
+ where secant jobs give "g0","g1" and bisection jobs give "a","b".
+'''
+import json
+import time
+from contextlib import nullcontext
+import numpy as np
+from exprCompile import compileExpr
+from instrument import instrumented
+
+############################## VARIABLES #############################
+SUCCESS = 0
+WONT_STOP = 1
+BAD_DATA = 2
+BAD_ITERATE = 3
+PRECISIONS = ('float64','float32','mixed')
+# float32 lanes hand over to float64 once |dx| falls below SWITCH*(1+|x|)
+EPS32 = float(np.finfo(np.float32).eps)
+NEWTON_SWITCH = np.sqrt(EPS32)
+BISECTION_SWITCH = 4*EPS32
+# one trace row per iteration of a batch engine (bits = 32 or 64)
+BATCH_FIELDS = ("iter","bits","active","maxdx")
+############################## FUNCTIONS #############################
+
+def _checkPrecision(precision):
+    if precision not in PRECISIONS:
+        raise ValueError("precision must be one of %s, got %r" % (PRECISIONS,precision))
+
+# f (and df) may be expression strings; with needDf a missing df is then
+# the symbolic derivative of f. Compiled kernels are counted by the monitor
+# here, since instrumented() only wraps callables; df is only resolved and
+# counted for the methods that call it.
+def _resolve(f,df=None,monitor=None,needDf=False):
+    if isinstance(df,str):
+        df = compileExpr(df).f
+        if monitor is not None:
+            df = monitor.counted(df,"df")
+    if isinstance(f,str):
+        kernel = compileExpr(f)
+        f = kernel.f
+        if df is None and needDf:
+            df = kernel.df
+            if monitor is not None:
+                df = monitor.counted(df,"df")
+        if monitor is not None:
+            f = monitor.counted(f,"f")
+    return f,df
+
+# Convergence test shared by all engines; switch=0 gives the plain |dx| <= TOL
+def _converged(dx,x,TOL,switch):
+    if switch:
+        return np.abs(dx) <= np.maximum(TOL,switch*(1+np.abs(x)))
+    return np.abs(dx) <= TOL
+
+# Newton iteration over the lanes of x in the given dtype.
+# budget holds the maximum number of iterations per lane.
+def _newton(f,df,x,TOL,budget,dtype,switch,monitor):
+    eps = 1e-20
+    x = x.astype(dtype)
+    n = x.size
+    state = np.full(n,WONT_STOP)
+    iters = budget.copy()
+    lanes = np.arange(n)
+    xa = x.copy()
+    for itn in range(1,int(budget.max(initial=0))+1):
+        if lanes.size == 0:
+            break
+        fx = np.asarray(f(xa),dtype=dtype)
+        dfx = np.asarray(df(xa),dtype=dtype)
+        bad = ~(np.abs(dfx) >= eps)
+        state[lanes[bad]] = BAD_ITERATE
+        iters[lanes[bad]] = itn
+        keep = ~bad
+        lanes,xa,fx,dfx = lanes[keep],xa[keep],fx[keep],dfx[keep]
+
+        dx = -fx/dfx
+        xa = xa + dx
+        x[lanes] = xa
+        if monitor is not None:
+            monitor.iteration(itn,8*np.dtype(dtype).itemsize,lanes.size,np.max(np.abs(dx),initial=0))
+
+        # Check error tolerance
+        conv = _converged(dx,xa,TOL,switch)
+        state[lanes[conv]] = SUCCESS
+        iters[lanes[conv]] = itn
+        keep = ~conv & (itn < budget[lanes])
+        lanes,xa = lanes[keep],xa[keep]
+    return state,x,iters
+
+# Secant iteration over the lanes of (g0,g1) in the given dtype
+def _secant(f,g0,g1,TOL,budget,dtype,switch,monitor):
+    eps = 1e-20
+    x = g1.astype(dtype)
+    n = x.size
+    state = np.full(n,WONT_STOP)
+    iters = budget.copy()
+    lanes = np.arange(n)
+    x0 = g0.astype(dtype)
+    f0 = np.asarray(f(x0),dtype=dtype)
+    xa = x.copy()
+    for itn in range(1,int(budget.max(initial=0))+1):
+        if lanes.size == 0:
+            break
+        fx = np.asarray(f(xa),dtype=dtype)
+        bad = ~(np.abs(fx - f0) >= eps)
+        state[lanes[bad]] = BAD_ITERATE
+        iters[lanes[bad]] = itn
+        keep = ~bad
+        lanes,xa,fx,x0,f0 = lanes[keep],xa[keep],fx[keep],x0[keep],f0[keep]
+
+        dx = -fx*(xa - x0)/(fx - f0)
+        x0 = xa
+        f0 = fx
+        xa = xa + dx
+        x[lanes] = xa
+        if monitor is not None:
+            monitor.iteration(itn,8*np.dtype(dtype).itemsize,lanes.size,np.max(np.abs(dx),initial=0))
+
+        # Check error tolerance
+        conv = _converged(dx,xa,TOL,switch)
+        state[lanes[conv]] = SUCCESS
+        iters[lanes[conv]] = itn
+        keep = ~conv & (itn < budget[lanes])
+        lanes,xa,x0,f0 = lanes[keep],xa[keep],x0[keep],f0[keep]
+    return state,x,iters
+
+# Bisection over the lanes of [a,b] in the given dtype.
+# Also returns the final brackets so that they can be polished.
+def _bisection(f,a,b,TOL,budget,dtype,switch,monitor):
+    # if necessary, swap a and b
+    a,b = np.minimum(a,b).astype(dtype),np.maximum(a,b).astype(dtype)
+    n = a.size
+    state = np.full(n,WONT_STOP)
+    iters = budget.copy()
+    x = np.full(n,np.nan,dtype=dtype)
+    fa = np.asarray(f(a),dtype=dtype)
+    fb = np.asarray(f(b),dtype=dtype)
+
+    # make sure there is a root between a and b
+    bad = np.sign(fa)*np.sign(fb) > 0
+    state[bad] = BAD_DATA
+    iters[bad] = 0
+    lanes = np.flatnonzero(~bad)
+    aa,fa = a[lanes],fa[lanes]
+    dx = (b - a)[lanes]
+    for itn in range(1,int(budget.max(initial=0))+1):
+        if lanes.size == 0:
+            break
+        dx = dx/2
+        xa = aa + dx
+        fx = np.asarray(f(xa),dtype=dtype)
+        x[lanes] = xa
+        if monitor is not None:
+            monitor.iteration(itn,8*np.dtype(dtype).itemsize,lanes.size,np.max(dx,initial=0))
+
+        right = np.sign(fa)*np.sign(fx) > 0
+        aa = np.where(right,xa,aa)
+        fa = np.where(right,fx,fa)
+        a[lanes] = aa
+        b[lanes] = aa + dx
+
+        # Check error tolerance
+        conv = _converged(dx,xa,TOL,switch)
+        state[lanes[conv]] = SUCCESS
+        iters[lanes[conv]] = itn
+        keep = ~conv & (itn < budget[lanes])
+        lanes,aa,fa,dx = lanes[keep],aa[keep],fa[keep],dx[keep]
+    return state,x,iters,a,b
+
+# Float64 polish of tight float32 brackets: secant steps inside the
+# bracket, reverting to bisection whenever the step leaves it
+# (the same safeguard as newtonBisection).
+def _bracketPolish(f,a,b,x,TOL,budget,monitor):
+    n = a.size
+    state = np.full(n,WONT_STOP)
+    iters = budget.copy()
+    fa = f(a)
+    fb = f(b)
+    bad = np.sign(fa)*np.sign(fb) > 0
+    state[bad] = BAD_DATA
+    iters[bad] = 0
+    lanes = np.flatnonzero(~bad)
+    aa,bb,fa,fb,xa = a[lanes],b[lanes],fa[lanes],fb[lanes],x[lanes]
+    for itn in range(1,int(budget.max(initial=0))+1):
+        if lanes.size == 0:
+            break
+        with np.errstate(divide='ignore',invalid='ignore'):
+            xNew = bb - fb*(bb - aa)/(fb - fa)
+        outside = ~((aa < xNew) & (xNew < bb))
+        xNew = np.where(outside,aa + (bb - aa)/2,xNew)
+        fx = f(xNew)
+        right = np.sign(fa)*np.sign(fx) > 0
+        aa,fa = np.where(right,xNew,aa),np.where(right,fx,fa)
+        bb,fb = np.where(right,bb,xNew),np.where(right,fb,fx)
+        dx = xNew - xa
+        xa = xNew
+        x[lanes] = xa
+        if monitor is not None:
+            monitor.iteration(itn,64,lanes.size,np.max(np.abs(dx),initial=0))
+
+        conv = (np.abs(dx) <= TOL) | (fx == 0)
+        state[lanes[conv]] = SUCCESS
+        iters[lanes[conv]] = itn
+        keep = ~conv & (itn < budget[lanes])
+        lanes,aa,bb,fa,fb,xa = (v[keep] for v in (lanes,aa,bb,fa,fb,xa))
+    return state,x,iters
+
+def _phase(monitor,name):
+    return nullcontext() if monitor is None else monitor.phase(name)
+
+# Hand lanes that finished the float32 phase to a float64 phase.
+# Lanes that failed in float32 are restarted from scratch in float64.
+def _mixed(phase32,phase64,restart64,n,MAX_ITERS,monitor):
+    budget = np.full(n,MAX_ITERS)
+    with _phase(monitor,"float32"):
+        s32,x32,it32 = phase32(budget)
+    ok = (s32 == SUCCESS) & np.isfinite(x32)
+    state = np.full(n,WONT_STOP)
+    x = x32.astype(np.float64)
+    iters = it32.copy()
+
+    with _phase(monitor,"float64"):
+        lanes = np.flatnonzero(ok)
+        if lanes.size:
+            s,xp,itp = phase64(lanes,x[lanes],np.maximum(MAX_ITERS - it32[lanes],1))
+            state[lanes],x[lanes],iters[lanes] = s,xp,it32[lanes] + itp
+        lanes = np.flatnonzero(~ok)
+        if lanes.size:
+            s,xp,itp = restart64(lanes,budget[lanes])
+            state[lanes],x[lanes],iters[lanes] = s,xp,itp
+    return state,x,iters
+
+@instrumented("newtonBatch",BATCH_FIELDS,funcs=("f","df"))
+def newtonBatch(f,df,x0,TOL,MAX_ITERS,debug=False,precision='float64',monitor=None):
+    _checkPrecision(precision)
+    f,df = _resolve(f,df,monitor,needDf=True)
+    x0 = np.asarray(x0,dtype=np.float64)
+    shape = x0.shape
+    x0 = x0.ravel()
+    n = x0.size
+    if precision == 'mixed':
+        state,x,iters = _mixed(
+            lambda bud: _newton(f,df,x0,TOL,bud,np.float32,NEWTON_SWITCH,monitor),
+            lambda lanes,xs,bud: _newton(f,df,xs,TOL,bud,np.float64,0,monitor),
+            lambda lanes,bud: _newton(f,df,x0[lanes],TOL,bud,np.float64,0,monitor),
+            n,MAX_ITERS,monitor)
+    elif precision == 'float32':
+        state,x,iters = _newton(f,df,x0,TOL,np.full(n,MAX_ITERS),np.float32,EPS32,monitor)
+    else:
+        state,x,iters = _newton(f,df,x0,TOL,np.full(n,MAX_ITERS),np.float64,0,monitor)
+    return state.reshape(shape),x.reshape(shape),iters.reshape(shape)
+
+@instrumented("secantBatch",BATCH_FIELDS,funcs=("f",))
+def secantBatch(f,g0,g1,TOL,MAX_ITERS,debug=False,precision='float64',monitor=None):
+    _checkPrecision(precision)
+    f,_ = _resolve(f,None,monitor)
+    g0,g1 = np.broadcast_arrays(np.asarray(g0,dtype=np.float64),np.asarray(g1,dtype=np.float64))
+    shape = g0.shape
+    g0,g1 = g0.ravel(),g1.ravel()
+    n = g0.size
+    if precision == 'mixed':
+        # restart the secant from the float32 root and a point sqrt(eps) away
+        def polish(lanes,xs,bud):
+            h = np.sqrt(np.finfo(np.float64).eps)*(1 + np.abs(xs))
+            return _secant(f,xs + h,xs,TOL,bud,np.float64,0,monitor)
+        state,x,iters = _mixed(
+            lambda bud: _secant(f,g0,g1,TOL,bud,np.float32,NEWTON_SWITCH,monitor),
+            polish,
+            lambda lanes,bud: _secant(f,g0[lanes],g1[lanes],TOL,bud,np.float64,0,monitor),
+            n,MAX_ITERS,monitor)
+    elif precision == 'float32':
+        state,x,iters = _secant(f,g0,g1,TOL,np.full(n,MAX_ITERS),np.float32,EPS32,monitor)
+    else:
+        state,x,iters = _secant(f,g0,g1,TOL,np.full(n,MAX_ITERS),np.float64,0,monitor)
+    return state.reshape(shape),x.reshape(shape),iters.reshape(shape)
+
+@instrumented("bisectionBatch",BATCH_FIELDS,funcs=("f",))
+def bisectionBatch(f,a,b,TOL,MAX_ITERS,debug=False,precision='float64',monitor=None):
+    _checkPrecision(precision)
+    f,_ = _resolve(f,None,monitor)
+    a,b = np.broadcast_arrays(np.asarray(a,dtype=np.float64),np.asarray(b,dtype=np.float64))
+    shape = a.shape
+    a,b = a.ravel(),b.ravel()
+    n = a.size
+    if precision == 'mixed':
+        bracket = {}
+        def phase32(bud):
+            s,x,it,a32,b32 = _bisection(f,a,b,TOL,bud,np.float32,BISECTION_SWITCH,monitor)
+            bracket['a'],bracket['b'] = a32.astype(np.float64),b32.astype(np.float64)
+            return s,x,it
+        def polish(lanes,xs,bud):
+            return _bracketPolish(f,bracket['a'][lanes],bracket['b'][lanes],xs,TOL,bud,monitor)
+        state,x,iters = _mixed(
+            phase32,
+            polish,
+            lambda lanes,bud: _bisection(f,a[lanes],b[lanes],TOL,bud,np.float64,0,monitor)[:3],
+            n,MAX_ITERS,monitor)
+        # a float32 bracket can be wrong when f is rounded near the root
+        lanes = np.flatnonzero(state == BAD_DATA)
+        if lanes.size:
+            s,xp,itp = _bisection(f,a[lanes],b[lanes],TOL,np.full(lanes.size,MAX_ITERS),np.float64,0,monitor)[:3]
+            state[lanes],x[lanes],iters[lanes] = s,xp,itp
+    elif precision == 'float32':
+        state,x,iters = _bisection(f,a,b,TOL,np.full(n,MAX_ITERS),np.float32,BISECTION_SWITCH,monitor)[:3]
+    else:
+        state,x,iters = _bisection(f,a,b,TOL,np.full(n,MAX_ITERS),np.float64,0,monitor)[:3]
+    return state.reshape(shape),x.reshape(shape),iters.reshape(shape)
+
+# Run one batch method in every precision and print accuracy and throughput.
+# args are the method's positional inputs before the tolerance, e.g.
+# comparePrecision(newtonBatch, (f, df, x0), 1e-12, 50)
+def comparePrecision(method,args,TOL,MAX_ITERS,repeats=3):
+    results = {}
+    for precision in PRECISIONS:
+        best = np.inf
+        for _ in range(repeats):
+            start = time.perf_counter()
+            state,x,iters = method(*args,TOL,MAX_ITERS,False,precision)
+            best = min(best,time.perf_counter() - start)
+        results[precision] = (state,np.asarray(x,dtype=np.float64),iters,best)
+
+    reference = results['float64'][1]
+    f,_ = _resolve(args[0])
+    print("{:>10} {:>12} {:>14} {:>10} {:>14} {:>14} {:>10}".format(
+        "precision","time [s]","lanes/s","success","max |f(x)|","max |x-x64|","mean iter"))
+    for precision,(state,x,iters,best) in results.items():
+        ok = state == SUCCESS
+        resid = np.max(np.abs(f(x[ok])),initial=0)
+        diff = np.max(np.abs(x[ok] - reference[ok]),initial=0)
+        print("{:>10} {:12.6f} {:14.6g} {:10d} {:14.6e} {:14.6e} {:10.3f}".format(
+            precision,best,x.size/best,int(np.count_nonzero(ok)),resid,diff,np.mean(iters)))
+    return results
+
+# Run every job in a JSON job file; returns a list of [state,x,iters]
+def runJobFile(path,debug=False):
+    with open(path) as fh:
+        jobs = json.load(fh)
+    results = []
+    for job in jobs:
+        method = job.get("method","newton")
+        tol = job.get("tol",1e-12)
+        maxIter = job.get("maxIter",100)
+        precision = job.get("precision","float64")
+        if method == "newton":
+            args = (job["f"],job.get("df"),job["x0"])
+            run = newtonBatch
+        elif method == "secant":
+            args = (job["f"],job["g0"],job["g1"])
+            run = secantBatch
+        elif method == "bisection":
+            args = (job["f"],job["a"],job["b"])
+            run = bisectionBatch
+        else:
+            raise ValueError("unknown method %r in %s" % (method,path))
+        results.append(run(*args,tol,maxIter,debug,precision))
+    return results
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  f = lambda x: x - np.exp(-x)
+##  df = lambda x: 1 + np.exp(-x)
+##  x0 = np.linspace(-1,3,10**6)
+##  [s,x,iters] = newtonBatch(f,df,x0,1e-12,50,False,'mixed')
+#### or with f as a string, the derivative is then generated
+##  [s,x,iters] = newtonBatch("x - exp(-x)",None,x0,1e-12,50)
+#### compare float64, float32 and mixed precision side by side
+##  comparePrecision(newtonBatch,(f,df,x0),1e-12,50)
+##  comparePrecision(secantBatch,(f,x0,x0+0.1),1e-12,50)
+##  comparePrecision(bisectionBatch,(f,np.zeros(10**6),np.ones(10**6)),1e-12,60)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+'''
+ ROOT FINDERS
+
+ The scalar solvers from the homework scripts (bisection, fixed point
+ iteration, Newton, modified Newton, Newton-bisection and secant) as plain
+ functions of f, so they can be imported without the interactive MAIN and
+ be instrumented (see instrument.py).
+
+  [state,x,iters] = bisection(f, a, b, tolerance, maxIteration, debug, monitor)
+  [state,x,iters] = fpi(g, x0, tolerance, maxIteration, debug, monitor)
+  [state,x,iters] = newton(f, df, x0, tolerance, maxIteration, debug, monitor, multiplicity)
+  [state,x,iters] = newtonBisection(f, df, a, b, tolerance, maxIteration, debug, monitor)
+  [state,x,iters] = secant(f, g0, g1, tolerance, maxIteration, debug, monitor)
+
+  Inputs:
+    f, df, g        The function, its derivative, or the fixed point map
+    a,b             The initial bounding interval, with a root between.
+    x0 / g0,g1      The initial guess(es) at the solution
+    tolerance       The convergence tolerance (must be > 0).
+    maxIteration    The maximum number of iterations that can be taken.
+    debug           Boolean for printing out information on every iteration.
+    monitor         Optional instrument.Monitor collecting counters, timings
+                    and a trace of every iteration (x, dx, ...). The error
+                    arrays of the homework scripts are monitor.trace.errors(x_true).
+    multiplicity    Root multiplicity m for modified Newton (dx = m*dx)
+  Outputs:
+    x               The solution
+    iters           Number of iterations to convergence
+  Return:
+    state           An error status code.
+      SUCCESS       Sucessful termination.
+      WONT_STOP     Error: Exceeded maximum number of iterations.
+      BAD_DATA      Error: The interval may not bracket a root.
+      BAD_ITERATE   Error: The function had a vanishing derivative
+'''
+from numpy import sign
+from instrument import instrumented
+
+############################## VARIABLES #############################
+SUCCESS = 0
+WONT_STOP = 1
+BAD_DATA = 2
+BAD_ITERATE = 3
+############################## FUNCTIONS #############################
+
+@instrumented("bisection",("iter","x","dx","a","b","fx"))
+def bisection(f,a,b,TOL,MAX_ITERS,debug=False,monitor=None):
+    global SUCCESS, WONT_STOP, BAD_DATA
+    x = None
+    # if necessary, swap a and b
+    if (a > b):
+        a,b = b,a
+    fa = f(a)
+    fb = f(b)
+
+    # make sure there is a root between a and b
+    if(sign(fa)*sign(fb) > 0.0):
+        return BAD_DATA,x,0
+
+    # iteration loop
+    dx = b-a
+    for itn in range(1,MAX_ITERS+1):
+        dx /= 2
+        x = a+dx
+        fx = f(x)
+        if monitor is not None:
+            monitor.iteration(itn,x,dx,a,a+2*dx,fx)
+
+        # Check error tolerance
+        if (dx <= TOL):
+            return SUCCESS,x,itn
+
+        if(sign(fa)*sign(fx) > 0.0):
+            a = x
+            fa = fx
+    return WONT_STOP,x,MAX_ITERS
+
+@instrumented("fpi",("iter","x","dx"),funcs=("g",))
+def fpi(g,x0,TOL,MAX_ITERS,debug=False,monitor=None):
+    global SUCCESS, WONT_STOP
+    x = x0
+    ## FPI Loop
+    for itn in range(1,MAX_ITERS+1):
+        gx = g(x)
+        dx = abs(x-gx)
+        x = gx
+        if monitor is not None:
+            monitor.iteration(itn,x,dx)
+
+        # Check error tolerance
+        if (dx <= TOL*(abs(x)+1)):
+            return SUCCESS,x,itn
+    return WONT_STOP,x,MAX_ITERS
+
+@instrumented("newton",("iter","x","dx"),funcs=("f","df"))
+def newton(f,df,x0,TOL,MAX_ITERS,debug=False,monitor=None,multiplicity=1):
+    global SUCCESS, WONT_STOP, BAD_ITERATE
+    eps = 1e-20
+    x = x0
+    ## Newton Loop
+    for itn in range(1,MAX_ITERS+1):
+        dfx = df(x)
+        if(abs(dfx) < eps):
+            return BAD_ITERATE,x,itn
+
+        # multiplicity > 1 gives modified Newton
+        dx = -multiplicity*f(x)/dfx
+        x += dx
+        if monitor is not None:
+            monitor.iteration(itn,x,dx)
+
+        # Check error tolerance
+        if (abs(dx) <= TOL):
+            return SUCCESS,x,itn
+    return WONT_STOP,x,MAX_ITERS
+
+@instrumented("newtonBisection",("iter","x","dx","a","b","newton"),funcs=("f","df"))
+def newtonBisection(f,df,a,b,TOL,MAX_ITERS,debug=False,monitor=None):
+    global SUCCESS, WONT_STOP, BAD_DATA
+    eps = 1e-20
+    # Swap a and b if necessary so a < b
+    if (a > b):
+        a,b = b,a
+    fa = f(a)
+    fb = f(b)
+
+    # Make sure there is a root between a and b
+    if(sign(fa)*sign(fb) > 0.0):
+        return BAD_DATA,None,0
+
+    x = a+(b-a)/2
+    fx = f(x)
+    if(sign(fa)*sign(fx) > 0.0):
+        a = x
+    else:
+        b = x
+
+    ## NewtonBisection Loop
+    for itn in range(1,MAX_ITERS+1):
+        dfx = df(x)
+        usedNewton = True
+        if(abs(dfx) > eps):
+            xNew = x - fx/dfx # Newton
+            if(xNew < a or b < xNew):
+                xNew = a + (b-a)/2 # Revert to Bisection
+                usedNewton = False
+        else:
+            xNew = a + (b-a)/2 # Revert to Bisection
+            usedNewton = False
+
+        fx = f(xNew)
+        if(sign(fa)*sign(fx) > 0.0):
+            a = xNew
+        else:
+            b = xNew
+
+        dx = xNew - x
+        x = xNew
+        if monitor is not None:
+            monitor.iteration(itn,x,dx,a,b,usedNewton)
+
+        # Check error tolerance
+        if (abs(dx) <= TOL):
+            return SUCCESS,x,itn
+    return WONT_STOP,x,MAX_ITERS
+
+@instrumented("secant",("iter","x","dx"))
+def secant(f,g0,g1,TOL,MAX_ITERS,debug=False,monitor=None):
+    global SUCCESS, WONT_STOP, BAD_ITERATE
+    eps = 1e-20
+    x = g1
+    f0 = f(g0)
+    ## Secant Loop
+    for itn in range(1,MAX_ITERS+1):
+        fx = f(x)
+        if(abs(fx-f0) < eps):
+            return BAD_ITERATE,x,itn
+
+        dx = -fx*(x-g0)/(fx-f0)
+        g0 = x
+        f0 = fx
+        x += dx
+        if monitor is not None:
+            monitor.iteration(itn,x,dx)
+
+        # Check error tolerance
+        if (abs(dx) <= TOL):
+            return SUCCESS,x,itn
+    return WONT_STOP,x,MAX_ITERS
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  from math import exp
+##  f = lambda x: x - exp(-x)
+##  df = lambda x: 1 + exp(-x)
+##  [s,x,iters] = newton(f,df,1.0,1e-12,50)
+#### modified Newton for the double root -2/3 of the HW3 polynomial
+##  [s,x,iters] = newton(p,dp,-0.5,1e-12,50,multiplicity=2)
+#### collect counters and the iteration trace
+##  from instrument import Monitor
+##  m = Monitor()
+##  [s,x,iters] = secant(f,0.0,1.0,1e-12,50,monitor=m)
+##  m.calls['f'], m.trace.errors(0.5671432904097838)
@@ -0,0 +1,169 @@
+# Smoothing Cubic Spline (Reinsch)
+#
+# Instead of interpolating noisy y exactly, the smoothing spline minimizes
+#
+#   sum_i w_i (y_i - a_i)^2 + lam * integral s''(t)^2 dt
+#
+# over natural cubic splines s with knots x and values a_i = s(x_i).
+# lam = 0 interpolates (cubicSplineSetup), lam -> infinity gives the
+# weighted least-squares line. With h_i = x[i+1] - x[i], the second
+# derivatives g = s''(x[1..n-2]) solve the symmetric pentadiagonal system
+#
+#   (R + lam Q^T W^-1 Q) g = Q^T y
+#
+# where Q^T takes second divided differences and R is the tridiagonal
+# matrix with (h_{i-1} + h_i)/3 on the diagonal and h_i/6 beside it. It is
+# solved by an O(n) LDL^T factorization, and a = y - lam W^-1 Q g.
+# The result is returned in the cubicSplineSetup layout: values a at the
+# knots and coefs (3, n) with coefs[1] = g/2; evaluate with
+# cubicSplineEvalArray(t, x, a, coefs).
+#
+# smoothingSplineGCV picks lam from a vector of candidates by generalized
+# cross-validation, GCV = n RSS/(n - tr A)^2. The trace of the influence
+# matrix A needs only the central five diagonals of the inverse of the
+# pentadiagonal matrix, computed from the same LDL^T in O(n) (Hutchinson
+# and de Hoog), so every candidate is O(n). The loops run over Python
+# floats, as in thomasFactor.
+
+import numpy as np
+from cubicSpline import input_sz,splineCoefs
+
+############################## FUNCTIONS #############################
+
+# Bands of Q^T W^-1 Q (b0, b1, b2) and of R (r0, r1), and the three
+# entries u, v, w of every column of Q
+def smoothingBands(x, wts):
+    h = np.diff(x)
+    u = 1/h[:-1]
+    w = 1/h[1:]
+    v = -(u + w)
+    sig = 1/wts
+    b0 = u*u*sig[:-2] + v*v*sig[1:-1] + w*w*sig[2:]
+    b1 = v[:-1]*u[1:]*sig[1:-2] + w[:-1]*v[1:]*sig[2:-1]
+    b2 = w[:-2]*u[2:]*sig[2:-2]
+    r0 = (h[:-1] + h[1:])/3
+    r1 = h[1:-1]/6
+    return (b0,b1,b2),(r0,r1),(u,v,w)
+
+# LDL^T of the symmetric pentadiagonal matrix with diagonal e0 and
+# off-diagonals e1, e2: returns d and the subdiagonals l1, l2 of L
+def pentaFactor(e0, e1, e2):
+    e0 = e0.tolist()
+    e1 = e1.tolist() + [0.0]
+    e2 = e2.tolist() + [0.0,0.0]
+    m = len(e0)
+    d = [0.0]*m
+    l1 = [0.0]*(m+1)
+    l2 = [0.0]*(m+2)
+    dm1 = dm2 = 0.0
+    for i in range(m):
+        di = e0[i] - l1[i-1]*l1[i-1]*dm1 - l2[i-2]*l2[i-2]*dm2
+        d[i] = di
+        l1[i] = (e1[i] - l2[i-1]*l1[i-1]*dm1)/di
+        l2[i] = e2[i]/di
+        dm2,dm1 = dm1,di
+    return d,l1,l2
+
+def pentaSolve(d, l1, l2, rhs):
+    z = rhs.tolist()
+    m = len(d)
+    zm1 = zm2 = 0.0
+    for i in range(m):
+        zi = z[i] - l1[i-1]*zm1 - l2[i-2]*zm2
+        z[i] = zi
+        zm2,zm1 = zm1,zi
+    xp1 = xp2 = 0.0
+    for i in range(m-1,-1,-1):
+        xi = z[i]/d[i] - l1[i]*xp1 - l2[i]*xp2
+        z[i] = xi
+        xp2,xp1 = xp1,xi
+    return np.array(z)
+
+# Diagonals s0, s1, s2 of the inverse inside the band, from
+# L^T S = D^-1 L^-1 solved from the bottom row up
+def pentaInverseBand(d, l1, l2):
+    m = len(d)
+    s0 = [0.0]*m
+    s1 = [0.0]*m
+    s2 = [0.0]*m
+    # S[i+1,i+1], S[i+2,i+2], S[i+1,i+2] of the rows below
+    a11 = a22 = a12 = 0.0
+    for i in range(m-1,-1,-1):
+        S02 = -l1[i]*a12 - l2[i]*a22
+        S01 = -l1[i]*a11 - l2[i]*a12
+        S00 = 1/d[i] - l1[i]*S01 - l2[i]*S02
+        s0[i],s1[i],s2[i] = S00,S01,S02
+        a22,a11,a12 = a11,S00,S01
+    return np.array(s0),np.array(s1[:-1]),np.array(s2[:-2])
+
+def _smooth(x, y, wts, lam, bands, qty, trace=False):
+    (b0,b1,b2),(r0,r1),(u,v,w) = bands
+    d,l1,l2 = pentaFactor(r0 + lam*b0,r1 + lam*b1,lam*b2)
+    g = pentaSolve(d,l1,l2,qty)
+    Qg = np.zeros(len(x))
+    Qg[:-2] += u*g
+    Qg[1:-1] += v*g
+    Qg[2:] += w*g
+    a = y - lam*Qg/wts
+    tr = None
+    if trace:
+        s0,s1,s2 = pentaInverseBand(d,l1,l2)
+        # tr(I - A) = lam tr(Q^T W^-1 Q S)
+        tr = len(x) - lam*(np.dot(b0,s0) + 2*np.dot(b1,s1) + 2*np.dot(b2,s2))
+    return a,g,tr
+
+def _check(x, y, w):
+    x = np.asarray(x,dtype=float)
+    y = np.asarray(y,dtype=float)
+    n = input_sz(x)
+    if len(y) != n:
+        raise ValueError("ERROR CODE 1: x and y are different sizes")
+    if n < 3:
+        raise ValueError("ERROR CODE 2: at least 3 points are needed")
+    if np.any(np.diff(x) <= 0):
+        raise ValueError("ERROR CODE 3: x must be increasing")
+    w = np.ones(n) if w is None else np.broadcast_to(np.asarray(w,dtype=float),(n,))
+    return x,y,w
+
+def _layout(x, a, g):
+    c = np.zeros(len(x))
+    c[1:-1] = g/2
+    return a,splineCoefs(x,a,c)
+
+# Smoothing spline for one lam: returns the knot values a and coefs
+def smoothingSpline(x, y, lam, w=None):
+    x,y,w = _check(x,y,w)
+    bands = smoothingBands(x,w)
+    u,v,ww = bands[2]
+    qty = u*y[:-2] + v*y[1:-1] + ww*y[2:]
+    a,g,_ = _smooth(x,y,w,lam,bands,qty)
+    return _layout(x,a,g)
+
+# Smoothing spline with lam chosen by GCV among lams. Returns the best lam,
+# its a and coefs, and the GCV score of every candidate.
+def smoothingSplineGCV(x, y, lams, w=None):
+    x,y,w = _check(x,y,w)
+    n = len(x)
+    bands = smoothingBands(x,w)
+    u,v,ww = bands[2]
+    qty = u*y[:-2] + v*y[1:-1] + ww*y[2:]
+    lams = np.atleast_1d(np.asarray(lams,dtype=float))
+    scores = np.empty(len(lams))
+    best = None
+    for k,lam in enumerate(lams):
+        a,g,tr = _smooth(x,y,w,lam,bands,qty,trace=True)
+        rss = np.dot(w,(y - a)**2)
+        scores[k] = n*rss/(n - tr)**2
+        if best is None or scores[k] < scores[best[0]]:
+            best = (k,a,g)
+    k,a,g = best
+    a,coefs = _layout(x,a,g)
+    return lams[k],a,coefs,scores
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  x = np.linspace(0,10,10**6)
+##  y = np.sin(x) + 0.1*np.random.randn(x.size)
+##  a,coefs = smoothingSpline(x,y,1e-6)
+##  cubicSplineEvalArray(t,x,a,coefs,orders=(0,))
+#### choose lam by generalized cross-validation
+##  lam,a,coefs,scores = smoothingSplineGCV(x,y,np.logspace(-8,0,9))
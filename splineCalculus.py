@@ -0,0 +1,144 @@
+# Cubic Spline Calculus
+#
+# Integrals and level crossings of a spline in the layout of
+# cubicSplineSetup, s(t) = y[i] + tt*(b[i] + tt*(c[i] + tt*d[i])),
+# tt = t - x[i], without sampling it densely.
+#
+#  calc = SplineCalculus(x, y, coefs)
+#
+#  Integrals: on every segment the antiderivative is the quartic
+#    F(t) = P[i] + tt*(y[i] + tt*(b[i]/2 + tt*(c[i]/3 + tt*d[i]/4)))
+#  where P[i] = integral of s from x[0] to x[i] is a prefix sum of the
+#  exact segment integrals. calc.integral(a,b) is then F(b) - F(a): one
+#  interval lookup per end, O(log n) (O(1) for uniform knots).
+#
+#  Crossings: calc.crossings(level) returns every t with s(t) = level. The
+#  critical points of each cubic split its segment into monotone pieces; a
+#  piece whose ends straddle the level holds exactly one root, found by a
+#  Newton iteration kept inside its bracket. All segments are solved
+#  together, vectorized.
+#
+# Outside [x[0], x[-1]] s is extended by its end values, as in
+# cubicSplineEval. y and coefs may be stacked (..., n) and (..., 3, n) as in
+# SplineSet for the integrals; crossings needs a single spline.
+
+import numpy as np
+from cubicSpline import input_sz,IntervalLocator
+
+############################## VARIABLES #############################
+MAX_ITERS = 60        # Newton/bisection steps of the crossing search
+############################## FUNCTIONS #############################
+
+class SplineCalculus:
+    def __init__(self,x,y,coefs,locate=None):
+        self.x = np.asarray(x,dtype=float)
+        self.y = np.asarray(y,dtype=float)
+        self.coefs = np.asarray(coefs,dtype=float)
+        self.n = input_sz(self.x)
+        self.locate = locate if locate is not None else IntervalLocator(self.x)
+        h = np.diff(self.x)
+        # antiderivative coefficients of every segment, rows y, b/2, c/3, d/4
+        anti = np.empty(self.y.shape[:-1] + (4,self.n))
+        anti[...,0,:] = self.y
+        anti[...,1,:] = self.coefs[...,0,:]/2
+        anti[...,2,:] = self.coefs[...,1,:]/3
+        anti[...,3,:] = self.coefs[...,2,:]/4
+        self.anti = anti
+        seg = h*(anti[...,0,:-1] + h*(anti[...,1,:-1] + h*(anti[...,2,:-1] + h*anti[...,3,:-1])))
+        self.prefix = np.zeros(self.y.shape)
+        np.cumsum(seg,axis=-1,out=self.prefix[...,1:])
+
+    # F(t) = integral of s from x[0] to t
+    def antiderivative(self,t):
+        t = np.asarray(t,dtype=float)
+        x = self.x
+        i = self.locate(t)
+        tt = np.clip(t,x[0],x[-1]) - x[i]
+        A = self.anti
+        F = self.prefix[...,i] + tt*(A[...,0,i] + tt*(A[...,1,i] + tt*(A[...,2,i] + tt*A[...,3,i])))
+        # constant extension beyond the ends
+        shape = self.y.shape[:-1] + (1,)*t.ndim
+        F = F + np.minimum(t - x[0],0)*self.y[...,0].reshape(shape) \
+              + np.maximum(t - x[-1],0)*self.y[...,-1].reshape(shape)
+        return F
+
+    # integral of s from a to b (arrays broadcast against each other)
+    def integral(self,a,b):
+        # broadcast first: on a stack the series axis leads, so the two ends
+        # only line up when they have the same shape
+        a,b = np.broadcast_arrays(np.asarray(a,dtype=float),np.asarray(b,dtype=float))
+        return self.antiderivative(b) - self.antiderivative(a)
+
+    # All t in [x[0], x[-1]] with s(t) = level, sorted: sign changes of
+    # s - level plus exact touches at knots and critical points
+    def crossings(self,level=0.0):
+        if self.y.ndim != 1:
+            raise ValueError("crossings needs a single spline, not a stack")
+        x = self.x
+        h = np.diff(x)
+        g0 = self.y[:-1] - level
+        b,c,d = self.coefs[0,:-1],self.coefs[1,:-1],self.coefs[2,:-1]
+
+        # critical points: roots of 3d tt^2 + 2c tt + b in (0,h), else h
+        A,B = 3*d,2*c
+        with np.errstate(divide='ignore',invalid='ignore'):
+            disc = B*B - 4*A*b
+            sq = np.sqrt(np.maximum(disc,0))
+            q = -0.5*(B + np.where(B < 0,-sq,sq))
+            r1 = np.where(A != 0,q/A,np.where(B != 0,-b/B,np.nan))
+            r2 = np.where(q != 0,b/q,np.nan)
+        r1 = np.where((disc >= 0) & (r1 > 0) & (r1 < h),r1,h)
+        r2 = np.where((disc >= 0) & (r2 > 0) & (r2 < h),r2,h)
+        r2 = np.where((A == 0) & (B != 0),h,r2)
+        ends = np.stack([np.zeros_like(h),r1,r2,h],axis=1)
+        ends.sort(axis=1)
+        g = g0[:,None] + ends*(b[:,None] + ends*(c[:,None] + ends*d[:,None]))
+        # exact values at the knots (critical points not inside the segment
+        # were moved to h as well), so a level met at a knot is only reported
+        # once, by knots below, and never as a rounding sign change
+        g[:,0] = g0
+        g = np.where(ends == h[:,None],(self.y[1:] - level)[:,None],g)
+
+        # exact touches at knots and at critical points
+        knots = x[self.y == level]
+        touch = (g[:,1:3] == 0) & (ends[:,1:3] > 0) & (ends[:,1:3] < h[:,None])
+        seg,k = np.nonzero(touch)
+        touches = x[seg] + ends[seg,k+1]
+
+        # one root inside every monotone piece with a sign change
+        change = g[:,:-1]*g[:,1:] < 0
+        seg,k = np.nonzero(change)
+        lo = ends[seg,k].copy()
+        hi = ends[seg,k+1].copy()
+        glo = g[seg,k]
+        g0,b,c,d = g0[seg],b[seg],c[seg],d[seg]
+        tt = 0.5*(lo + hi)
+        tol = 4*np.finfo(float).eps*(np.abs(x[seg]) + h[seg])
+        for _ in range(MAX_ITERS):
+            gt = g0 + tt*(b + tt*(c + tt*d))
+            dg = b + tt*(2*c + tt*3*d)
+            left = np.sign(gt) == np.sign(glo)
+            lo = np.where(left,tt,lo)
+            hi = np.where(left,hi,tt)
+            with np.errstate(divide='ignore',invalid='ignore'):
+                new = tt - gt/dg
+            # fall back to bisection when Newton leaves the bracket
+            new = np.where((new > lo) & (new < hi),new,0.5*(lo + hi))
+            done = (np.abs(new - tt) <= tol) | (gt == 0)
+            tt = np.where(gt == 0,tt,new)
+            if done.all():
+                break
+        roots = x[seg] + tt
+        return np.unique(np.concatenate([knots,touches,roots]))
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  x = np.linspace(0,10,101)
+##  coefs = cubicSplineSetup(x,np.sin(x))
+##  calc = SplineCalculus(x,np.sin(x),coefs)
+##  calc.integral(0,np.pi)                                  # about 2
+##  calc.integral(np.zeros(10**6),np.random.rand(10**6)*10) # many at once
+##  calc.crossings(0.5)                                     # all t with s(t) = 0.5
+#### integrals of every series of a SplineSet
+##  calc = SplineCalculus(s.x,s.y,s.coefs,s.locate)
+##  calc.integral(0,5)                                      # shape (series,)
+##  calc.integral(0,np.array([1.,2.,3.]))                   # shape (series, 3)
@@ -0,0 +1,102 @@
+# Binary Spline Files
+#
+# Stores knots x, values y and coefs (the cubicSplineSetup layout, or a
+# SplineSet stack) so that a spline is fitted once and then opened by any
+# number of processes with np.memmap: read-only, no copy and no refit.
+#
+# Layout, in the spirit of the .npy format:
+#   MAGIC (8 bytes) | major, minor version (2 x uint8) | header length (uint16 LE)
+#   | header: ASCII JSON padded with spaces and a newline so that the payload
+#     starts on an ALIGN byte boundary
+#   | payload: little-endian float64, C order, x (n,) then y (series, n)
+#     then coefs (series, 3, n)
+# The header records n, series (0 for a single (3, n) spline), the end
+# conditions and the byte offset of every array.
+
+import json
+import numpy as np
+
+############################## VARIABLES #############################
+MAGIC = b"\x93CSPLINE"
+VERSION = (1,0)
+ALIGN = 64
+PRELUDE = len(MAGIC) + 4
+############################## FUNCTIONS #############################
+
+def saveSpline(path,x,y,coefs,bc='natural'):
+    x = np.ascontiguousarray(x,dtype='<f8')
+    y = np.ascontiguousarray(y,dtype='<f8')
+    coefs = np.ascontiguousarray(coefs,dtype='<f8')
+    n = x.size
+    series = 0 if y.ndim == 1 else y.shape[0]
+    m = max(series,1)
+    if y.size != m*n or coefs.size != 3*m*n:
+        raise ValueError("ERROR CODE 1: x, y and coefs are different sizes")
+    header = {"n": n,"series": series,"bc": bc,"dtype": "<f8"}
+    # offsets are relative to the payload, which starts at header["offset"]
+    header["arrays"] = {"x": 0,"y": 8*n,"coefs": 8*n*(1 + m)}
+    text = json.dumps(header,sort_keys=True)
+    # the offset depends on the header length; fixed point in two passes
+    for _ in range(2):
+        size = PRELUDE + len(text) + 1
+        header["offset"] = size + (-size) % ALIGN
+        text = json.dumps(header,sort_keys=True)
+    size = PRELUDE + len(text) + 1
+    text = text + " "*((-size) % ALIGN) + "\n"
+    if PRELUDE + len(text) != header["offset"]:
+        raise ValueError("ERROR CODE 2: header does not fit its offset")
+    with open(path,"wb") as fh:
+        fh.write(MAGIC)
+        fh.write(bytes(VERSION))
+        fh.write(len(text).to_bytes(2,"little"))
+        fh.write(text.encode("ascii"))
+        for a in (x,y,coefs):
+            fh.write(a.tobytes())
+
+def readHeader(path):
+    with open(path,"rb") as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError("ERROR CODE 3: %s is not a spline file" % path)
+        major,minor = fh.read(2)
+        if major != VERSION[0]:
+            raise ValueError("ERROR CODE 4: spline file version %d.%d, expected %d.x" % (major,minor,VERSION[0]))
+        length = int.from_bytes(fh.read(2),"little")
+        header = json.loads(fh.read(length).decode("ascii"))
+    header["version"] = (major,minor)
+    return header
+
+# Open a spline file. With mmap=True (default) the arrays are read-only
+# views of one np.memmap of the payload; with mmap=False they are loaded.
+# Returns x, y, coefs and the header.
+def loadSpline(path,mmap=True):
+    header = readHeader(path)
+    n = header["n"]
+    series = header["series"]
+    m = max(series,1)
+    total = n*(1 + 4*m)
+    if mmap:
+        data = np.memmap(path,dtype=header["dtype"],mode="r",offset=header["offset"],shape=(total,))
+    else:
+        with open(path,"rb") as fh:
+            fh.seek(header["offset"])
+            data = np.fromfile(fh,dtype=header["dtype"],count=total)
+    off = {k: v//8 for k,v in header["arrays"].items()}
+    x = data[off["x"]:off["x"]+n]
+    y = data[off["y"]:off["y"]+m*n]
+    coefs = data[off["coefs"]:off["coefs"]+3*m*n]
+    if series:
+        y = y.reshape(series,n)
+        coefs = coefs.reshape(series,3,n)
+    else:
+        coefs = coefs.reshape(3,n)
+    return x,y,coefs,header
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  coefs = cubicSplineSetup(x,y)
+##  saveSpline("table.spl",x,y,coefs)
+##  x,y,coefs,header = loadSpline("table.spl")          # memory mapped
+##  cubicSplineEvalArray(t,x,y,coefs,orders=(0,))
+#### a SplineSet, shared read-only by worker processes
+##  saveSpline("set.spl",s.x,s.y,s.coefs,s.bc)
+##  x,Y,coefs,header = loadSpline("set.spl")
+##  s = SplineSet.fromCoefs(x,Y,coefs,header["bc"])
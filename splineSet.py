@@ -0,0 +1,113 @@
+# Cubic Splines for Many Series on Shared Knots
+#
+# cubicSplineSetup(x,y) eliminates the tridiagonal system again for every y.
+# The matrix only depends on the knots, so SplineSet factors it once
+# (thomasFactor) and fit() back substitutes all the series together, one
+# knot per step with the whole row of series updated at once.
+#
+#  s = SplineSet(x, Y)
+#
+#  Inputs:
+#    x          n knots, increasing
+#    Y          (series, n) values, one row per series
+#    bc         end conditions, one of BOUNDARY in cubicSpline.py
+#  Attributes:
+#    s.coefs    contiguous (series, 3, n) array; s.coefs[j] is the (3, n)
+#               cubicSplineSetup layout b, c, d of series j
+#    s.y        contiguous (series, n) values
+#
+# s(t) evaluates every series at the points t: the intervals are found once
+# for all series, shape (series,) + t.shape. Uniform knots are detected and
+# located in O(1); SplineSet(x,Y,buckets=m) adds a bucket index for others.
+
+import numpy as np
+from cubicSpline import input_sz,IntervalLocator,splineBands,splineFactor,splineSolve,splineCoefs
+
+############################## FUNCTIONS #############################
+
+class SplineSet:
+    def __init__(self,x,Y=None,buckets=None,bc='natural',slopes=(0,0)):
+        self.x = np.ascontiguousarray(x,dtype=float)
+        self.n = input_sz(self.x)
+        if self.n < 2:
+            raise ValueError("ERROR CODE 1: at least 2 knots are needed")
+        if np.any(np.diff(self.x) <= 0):
+            raise ValueError("ERROR CODE 2: knots must be increasing")
+        self.bc = bc
+        self._factor = None
+        self.locate = IntervalLocator(self.x,buckets)
+        self.y = None
+        self.coefs = None
+        if Y is not None:
+            self.fit(Y,slopes)
+
+    # Wrap coefficients computed earlier (e.g. loaded with splineIO) without
+    # fitting again; the arrays are used as they are, memmaps included
+    @classmethod
+    def fromCoefs(cls,x,Y,coefs,bc='natural',buckets=None):
+        s = cls(x,buckets=buckets,bc=bc)
+        s.y = np.atleast_2d(Y)
+        s.coefs = coefs if coefs.ndim == 3 else coefs[None]
+        return s
+
+    # (Re)fit all the series, factoring the knots on the first call; for
+    # clamped ends slopes = (left, right), each a number or one per series
+    def fit(self,Y,slopes=(0,0)):
+        Y = np.atleast_2d(np.asarray(Y,dtype=float))
+        if Y.shape[-1] != self.n:
+            raise ValueError("ERROR CODE 1: x and the rows of Y are different sizes")
+        if self._factor is None:
+            subDiag,diag,superDiag,_ = splineBands(self.x,np.zeros(self.n),self.bc)
+            self._factor = splineFactor(subDiag,diag,superDiag,self.bc)
+        _,_,_,rhs = splineBands(self.x,Y.T,self.bc,slopes)
+        c = splineSolve(self._factor,self.x,rhs)
+        self.y = np.ascontiguousarray(Y)
+        self.coefs = np.ascontiguousarray(splineCoefs(self.x,Y,c.T))
+        return self
+
+    @property
+    def series(self):
+        return self.y.shape[0]
+
+    # interval index of every point, shared by all the series: O(1) for
+    # uniform knots or with a bucket index, a binary search otherwise
+    def interval(self,t):
+        return self.locate(t)
+
+    # Values (0), derivatives (1) and curvatures (2) of every series at t,
+    # as a list in the order requested. Extrapolation as in cubicSplineEval.
+    def evaluate(self,t,orders=(0,)):
+        t = np.asarray(t,dtype=float)
+        i = self.interval(t)
+        tt = t - self.x[i]
+        b = self.coefs[:,0,i]
+        c = self.coefs[:,1,i]
+        d = self.coefs[:,2,i]
+        left = t <= self.x[0]
+        right = t >= self.x[-1]
+        out = []
+        for order in orders:
+            if order == 0:
+                r = self.y[:,i] + tt*(b + tt*(c + tt*d))
+                r = np.where(left,self.y[:,:1].reshape((-1,)+(1,)*t.ndim),r)
+                r = np.where(right,self.y[:,-1:].reshape((-1,)+(1,)*t.ndim),r)
+            elif order == 1:
+                r = np.where(left | right,0.0,b + tt*(2*c + tt*3*d))
+            elif order == 2:
+                r = np.where(left | right,0.0,2*c + tt*6*d)
+            else:
+                raise ValueError("orders must be 0 (value), 1 (derivative) or 2 (curvature)")
+            out.append(r)
+        return out
+
+    def __call__(self,t):
+        return self.evaluate(t)[0]
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  x = np.linspace(0,10,200)
+##  Y = np.sin(np.outer(np.arange(1,1001),x)/50)     # 1000 series
+##  s = SplineSet(x,Y)
+##  s(np.linspace(0,10,5000))                       # shape (1000, 5000)
+##  val,der = s.evaluate(2.5,orders=(0,1))          # shape (1000,) each
+#### new data on the same knots reuses the factorization
+##  s.fit(Y2)
@@ -0,0 +1,146 @@
+# Sliding-Window Natural Cubic Spline for Streaming Data
+#
+# Rebuilding with cubicSplineSetup() on every new sample is O(n). The
+# spline system is diagonally dominant, so the effect of changing one end
+# on c = coefs[1,:] decays geometrically with the distance in knots: by a
+# factor of at least 2 per knot and 2 + sqrt(3) = 3.7 for uniform knots.
+# StreamingSpline therefore only re-solves the LOCAL knots next to the
+# end that changed, with c held fixed at the knot where the update stops:
+#
+#   append(x, y)   adds a knot at the right (evicting the oldest one when
+#                  the window is full); c is re-solved on the last LOCAL knots
+#   evict()        drops the oldest knot; c is re-solved on the first LOCAL
+#
+# Each update is O(LOCAL) whatever the window size. The result agrees with
+# the natural spline of the window to about 2^-LOCAL relative to the
+# change (3.7^-LOCAL for uniform knots); refit() solves the whole window.
+# Only c is stored; b and d of the segments being evaluated are computed
+# from it on the fly, so evaluation needs no refit either.
+
+import numpy as np
+from cubicSpline import splineBands,thomasFactor,thomasSolve,splineCoefs
+
+############################## VARIABLES #############################
+LOCAL = 32
+############################## FUNCTIONS #############################
+
+class StreamingSpline:
+    def __init__(self,window,local=LOCAL):
+        if window < 2:
+            raise ValueError("ERROR CODE 1: the window needs at least 2 knots")
+        self.window = window
+        self.local = local
+        # knots live in [start, end) of buffers twice the window, moved
+        # back to the front when end reaches the capacity
+        self._x = np.empty(2*window)
+        self._y = np.empty(2*window)
+        self._c = np.empty(2*window)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    @property
+    def x(self):
+        return self._x[self.start:self.end]
+
+    @property
+    def y(self):
+        return self._y[self.start:self.end]
+
+    @property
+    def c(self):
+        return self._c[self.start:self.end]
+
+    # coefficients of the window in the (3, n) layout of cubicSplineSetup
+    @property
+    def coefs(self):
+        return splineCoefs(self.x,self.y,self.c)
+
+    # Re-solve c on the knots lo+1..hi-1 (window indices) with c[lo] and
+    # c[hi] held at their current values
+    def _localSolve(self,lo,hi):
+        if hi - lo < 2:
+            return
+        x = self.x[lo:hi+1]
+        y = self.y[lo:hi+1]
+        c = self.c
+        subDiag,diag,superDiag,rhs = splineBands(x,y)
+        rhs[1] -= subDiag[1]*c[lo]
+        rhs[-2] -= superDiag[-2]*c[hi]
+        mult,piv = thomasFactor(subDiag[1:-1],diag[1:-1],superDiag[1:-1])
+        c[lo+1:hi] = thomasSolve(mult,piv,superDiag[1:-1],rhs[1:-1])
+
+    def append(self,xn,yn):
+        if len(self) and xn <= self._x[self.end-1]:
+            raise ValueError("ERROR CODE 2: knots must be appended in increasing order")
+        if len(self) == self.window:
+            self.evict()
+        if self.end == len(self._x):
+            n = len(self)
+            for buf in (self._x,self._y,self._c):
+                buf[:n] = buf[self.start:self.end]
+            self.start,self.end = 0,n
+        self._x[self.end] = xn
+        self._y[self.end] = yn
+        self._c[self.end] = 0     # natural end
+        self.end += 1
+        n = len(self)
+        self._localSolve(max(0,n-1-self.local),n-1)
+
+    def evict(self):
+        if len(self) == 0:
+            raise ValueError("ERROR CODE 3: the window is empty")
+        self.start += 1
+        n = len(self)
+        if n:
+            self._c[self.start] = 0     # natural end
+            self._localSolve(0,min(n-1,self.local+1))
+
+    # solve the whole window exactly
+    def refit(self):
+        n = len(self)
+        self._c[self.start:self.end] = 0
+        self._localSolve(0,n-1)
+
+    # Values (0), derivatives (1) and curvatures (2) at t, as a list in the
+    # order requested; extrapolation as in cubicSplineEval
+    def evaluate(self,t,orders=(0,)):
+        t = np.asarray(t,dtype=float)
+        x,y,c = self.x,self.y,self.c
+        n = len(x)
+        i = np.clip(np.searchsorted(x,t,side='right') - 1,0,n-2)
+        h = x[i+1] - x[i]
+        b = (y[i+1] - y[i])/h - h*(2*c[i] + c[i+1])/3
+        d = (c[i+1] - c[i])/(3*h)
+        ci = c[i]
+        tt = t - x[i]
+        left = t <= x[0]
+        right = t >= x[-1]
+        out = []
+        for order in orders:
+            if order == 0:
+                r = y[i] + tt*(b + tt*(ci + tt*d))
+                r = np.where(left,y[0],np.where(right,y[-1],r))
+            elif order == 1:
+                r = np.where(left | right,0.0,b + tt*(2*ci + tt*3*d))
+            elif order == 2:
+                r = np.where(left | right,0.0,2*ci + tt*6*d)
+            else:
+                raise ValueError("orders must be 0 (value), 1 (derivative) or 2 (curvature)")
+            out.append(r)
+        return out
+
+    def __call__(self,t):
+        return self.evaluate(t)[0]
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  s = StreamingSpline(window=1000)
+##  for t in range(10**5):
+##      s.append(t,reading(t))          # O(LOCAL) per sample
+##  s(np.linspace(s.x[0],s.x[-1],5000))
+##  s.evict()                           # drop the oldest sample
+#### compare with (or resynchronize to) the exact spline of the window
+##  cubicSplineSetup(s.x,s.y)[1] - s.c
+##  s.refit()
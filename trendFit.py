@@ -0,0 +1,111 @@
+# Streaming Least-Squares Trend Fitting
+#
+# HW7/newtonDD.py extrapolates the production data to 2010 with the degree
+# n-1 interpolant through all n years (estimate_2010), which oscillates
+# and has to be rebuilt from scratch for every new year. TrendFit keeps a
+# least-squares polynomial of a fixed low degree instead,
+#
+#   p(t) = sum_{k=0}^{d} c_k T_k(s),  s = (2t - a - b)/(b - a)
+#
+# in the Chebyshev basis on the scaled domain [a,b], which keeps the
+# problem well conditioned. The fit is held as the R factor of a QR
+# factorization of the basis matrix and Q^T y. A new point is one more row,
+# folded into R with d+1 Givens rotations: O(d^2) per point, and the
+# coefficients come from one O(d^2) back substitution.
+#
+# Many series can be fitted at once: y may be an array (one value per
+# series) and t a scalar shared by all of them or an array of the same
+# shape (one abscissa per series).
+
+import numpy as np
+from chebInterp import clenshaw
+
+############################## FUNCTIONS #############################
+
+# Chebyshev basis T_0..T_d at the scaled points, shape s.shape + (d+1,)
+def chebBasis(s,d):
+    s = np.asarray(s,dtype=float)
+    T = np.empty(s.shape + (d+1,))
+    T[...,0] = 1
+    if d > 0:
+        T[...,1] = s
+    for k in range(2,d+1):
+        T[...,k] = 2*s*T[...,k-1] - T[...,k-2]
+    return T
+
+class TrendFit:
+    def __init__(self,degree,a,b):
+        self.degree = degree
+        self.a = float(a)
+        self.b = float(b)
+        self.n = 0
+        self.R = None       # (..., d+1, d+1) upper triangular
+        self.qty = None     # (..., d+1) Q^T y
+        self.rss = None     # residual sum of squares, one per series
+
+    # add one point (t, y) to every series
+    def add(self,t,y):
+        d1 = self.degree + 1
+        t = np.asarray(t,dtype=float)
+        y = np.array(y,dtype=float)
+        row = chebBasis((2*t - self.a - self.b)/(self.b - self.a),self.degree)
+        if self.R is None:
+            shape = np.broadcast_shapes(t.shape,y.shape)
+            self.R = np.zeros(t.shape + (d1,d1))
+            self.qty = np.zeros(shape + (d1,))
+            self.rss = np.zeros(shape)
+        R = self.R
+        qty = self.qty
+        v = np.broadcast_to(y,self.rss.shape).copy()
+        # Givens rotation of row k of R with the new row zeroes row[k]
+        for k in range(d1):
+            rho = np.hypot(R[...,k,k],row[...,k])
+            zero = rho == 0
+            c = np.where(zero,1.0,R[...,k,k]/np.where(zero,1.0,rho))
+            s = np.where(zero,0.0,row[...,k]/np.where(zero,1.0,rho))
+            Rk = R[...,k,k:].copy()
+            R[...,k,k:] = c[...,None]*Rk + s[...,None]*row[...,k:]
+            row[...,k:] = c[...,None]*row[...,k:] - s[...,None]*Rk
+            qk = qty[...,k].copy()
+            qty[...,k] = c*qk + s*v
+            v = c*v - s*qk
+        # what is left of the new value is orthogonal to the basis
+        self.rss += v*v
+        self.n += 1
+
+    # add a sequence of points; y has one row per point
+    def extend(self,ts,ys):
+        for t,y in zip(ts,ys):
+            self.add(t,y)
+
+    # Chebyshev coefficients (..., d+1) by back substitution
+    @property
+    def coefs(self):
+        d1 = self.degree + 1
+        if self.n < d1:
+            raise ValueError("ERROR CODE 1: %d points cannot determine a degree %d fit" % (self.n,self.degree))
+        R = self.R
+        c = np.empty(self.qty.shape)
+        for k in range(d1-1,-1,-1):
+            c[...,k] = (self.qty[...,k] - np.sum(R[...,k,k+1:]*c[...,k+1:],axis=-1))/R[...,k,k]
+        return c
+
+    # value of the fitted trend at t (shape t.shape + the series shape)
+    def __call__(self,t):
+        coefs = self.coefs
+        t = np.asarray(t,dtype=float)
+        t = t.reshape(t.shape + (1,)*(coefs.ndim-1))
+        return clenshaw(t,coefs,self.a,self.b)
+
+#### THE FOLLOWING SHOWS BASIC USAGE
+##  years = np.array([1994, 1995, 1996, 1997, 1998, 1999, 2000, 2001, 2002, 2003])
+##  production = np.array([67.052, 68.008, 69.803, 72.024, 73.400, 72.063, 74.669, 74.487, 74.065, 76.777])
+##  trend = TrendFit(2,1994,2010)
+##  trend.extend(years,production)
+##  trend(2010)
+##  trend.add(2004,78.1)          # O(degree^2), no refit
+##  trend(2010), trend.rss
+#### many series observed in the same years: y has one entry per series
+##  trend = TrendFit(3,1994,2010)
+##  trend.extend(years,Y.T)       # Y.shape == (m, 10)
+##  trend(2010)                   # shape (m,)